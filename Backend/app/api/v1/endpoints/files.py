@@ -1,218 +1,704 @@
-from fastapi import APIRouter, HTTPException, Depends, status, UploadFile, File, Form
-from fastapi.responses import FileResponse
-from typing import Optional, List
-from datetime import datetime
-import uuid
-import os
-import aiofiles
-
-from app.core.config import settings
-from app.core.database import get_database
-from app.core.security import get_current_active_user
-from app.models.user import User
-
-router = APIRouter()
-
-
-@router.post("/upload", response_model=dict)
-async def upload_file(
-    file: UploadFile = File(...),
-    analysis_id: Optional[str] = Form(None),
-    current_user: User = Depends(get_current_active_user)
-):
-    """Upload a file"""
-    
-    # Validate file type
-    if file.content_type not in settings.ALLOWED_FILE_TYPES:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File type {file.content_type} not allowed"
-        )
-    
-    # Validate file size
-    file_size = 0
-    content = await file.read()
-    file_size = len(content)
-    
-    if file_size > settings.MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File size too large. Maximum size is {settings.MAX_FILE_SIZE} bytes"
-        )
-    
-    # Reset file pointer
-    await file.seek(0)
-    
-    # Verify analysis exists if provided
-    if analysis_id:
-        db = get_database()
-        analysis = await db.analyses.find_one({
-            "_id": analysis_id,
-            "user_id": current_user.id
-        })
-        
-        if not analysis:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Analysis not found"
-            )
-    
-    # Generate unique filename
-    file_id = str(uuid.uuid4())
-    file_extension = os.path.splitext(file.filename)[1]
-    unique_filename = f"{file_id}{file_extension}"
-    file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
-    
-    # Save file
-    async with aiofiles.open(file_path, 'wb') as f:
-        await f.write(content)
-    
-    # Save file metadata to database
-    db = get_database()
-    file_doc = {
-        "_id": file_id,
-        "filename": file.filename,
-        "unique_filename": unique_filename,
-        "content_type": file.content_type,
-        "size": file_size,
-        "user_id": current_user.id,
-        "analysis_id": analysis_id,
-        "upload_date": datetime.utcnow(),
-        "file_path": file_path
-    }
-    
-    await db.files.insert_one(file_doc)
-    
-    # Update analysis with file ID if provided
-    if analysis_id:
-        await db.analyses.update_one(
-            {"_id": analysis_id},
-            {"$push": {"file_ids": file_id}}
-        )
-    
-    return {
-        "file_id": file_id,
-        "filename": file.filename,
-        "size": file_size,
-        "content_type": file.content_type,
-        "message": "File uploaded successfully"
-    }
-
-
-@router.get("/", response_model=List[dict])
-async def get_files(
-    analysis_id: Optional[str] = None,
-    current_user: User = Depends(get_current_active_user)
-):
-    """Get user's files"""
-    db = get_database()
-    
-    # Build query
-    query = {"user_id": current_user.id}
-    
-    if analysis_id:
-        query["analysis_id"] = analysis_id
-    
-    # Get files
-    cursor = db.files.find(query, {"file_path": 0})  # Exclude file_path for security
-    files = await cursor.to_list(length=None)
-    
-    return files
-
-
-@router.get("/{file_id}", response_class=FileResponse)
-async def download_file(
-    file_id: str,
-    current_user: User = Depends(get_current_active_user)
-):
-    """Download a file"""
-    db = get_database()
-    
-    # Get file metadata
-    file_doc = await db.files.find_one({
-        "_id": file_id,
-        "user_id": current_user.id
-    })
-    
-    if not file_doc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="File not found"
-        )
-    
-    # Check if file exists on disk
-    if not os.path.exists(file_doc["file_path"]):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="File not found on disk"
-        )
-    
-    return FileResponse(
-        path=file_doc["file_path"],
-        filename=file_doc["filename"],
-        media_type=file_doc["content_type"]
-    )
-
-
-@router.delete("/{file_id}", response_model=dict)
-async def delete_file(
-    file_id: str,
-    current_user: User = Depends(get_current_active_user)
-):
-    """Delete a file"""
-    db = get_database()
-    
-    # Get file metadata
-    file_doc = await db.files.find_one({
-        "_id": file_id,
-        "user_id": current_user.id
-    })
-    
-    if not file_doc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="File not found"
-        )
-    
-    # Delete file from disk
-    try:
-        if os.path.exists(file_doc["file_path"]):
-            os.remove(file_doc["file_path"])
-    except Exception as e:
-        # Log error but continue with database deletion
-        pass
-    
-    # Remove file from analysis if associated
-    if file_doc.get("analysis_id"):
-        await db.analyses.update_one(
-            {"_id": file_doc["analysis_id"]},
-            {"$pull": {"file_ids": file_id}}
-        )
-    
-    # Delete file metadata
-    await db.files.delete_one({"_id": file_id})
-    
-    return {"message": "File deleted successfully"}
-
-
-@router.get("/{file_id}/info", response_model=dict)
-async def get_file_info(
-    file_id: str,
-    current_user: User = Depends(get_current_active_user)
-):
-    """Get file information"""
-    db = get_database()
-    
-    # Get file metadata
-    file_doc = await db.files.find_one(
-        {"_id": file_id, "user_id": current_user.id},
-        {"file_path": 0}  # Exclude file_path for security
-    )
-    
-    if not file_doc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="File not found"
-        )
-    
-    return file_doc 
\ No newline at end of file
+from fastapi import APIRouter, HTTPException, Depends, status, UploadFile, File, Form, Request, Path, Query, Response
+from fastapi.responses import FileResponse
+from pymongo import ReturnDocument
+from typing import Optional, List
+from datetime import datetime, timedelta
+import uuid
+import math
+import os
+
+from app.core.config import settings
+from app.core.database import get_database
+from app.core.security import get_current_active_user
+from app.core.extraction import schedule_extraction, delete_financial_rows
+from app.core.pagination import paginate, paginate_list
+from app.core.dashboard import bump_analysis_revision
+from app.core.storage import (
+    stream_chunks_to_file,
+    iter_upload_chunks,
+    iter_files_chunks,
+    write_blob,
+    acquire_blob,
+    release_blob,
+    blob_path_for,
+    remove_quietly,
+    remove_tree_quietly,
+    UploadTooLargeError
+)
+from app.models.user import User
+from app.models.file import (
+    FileStatus,
+    FileLinkRequest,
+    UploadSessionCreate,
+    UploadSessionResponse
+)
+
+router = APIRouter()
+
+# Statuses of upload sessions that are not files yet
+SESSION_STATUSES = [FileStatus.UPLOADING, FileStatus.ASSEMBLING]
+
+
+async def verify_analysis_owner(analysis_id: str, user_id: str) -> None:
+    """Ensure an analysis exists and belongs to the user"""
+    if settings.DISABLE_DATABASE:
+        return
+    
+    db = get_database()
+    analysis = await db.analyses.find_one({
+        "_id": analysis_id,
+        "user_id": user_id
+    })
+    
+    if not analysis:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analysis not found"
+        )
+
+
+async def get_user_file(file_id: str, user_id: str) -> dict:
+    """Get a file owned by the user from the database or mock data"""
+    db = get_database()
+    
+    if settings.DISABLE_DATABASE:
+        file_doc = db.get_file_by_id(file_id)
+        if file_doc and file_doc.get("user_id") != user_id:
+            file_doc = None
+    else:
+        file_doc = await db.files.find_one({"_id": file_id, "user_id": user_id})
+    
+    if not file_doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    
+    return file_doc
+
+
+async def save_file_doc(file_doc: dict) -> None:
+    """Insert file metadata and attach the file to its analysis"""
+    db = get_database()
+    
+    if settings.DISABLE_DATABASE:
+        mock_doc = file_doc.copy()
+        mock_doc["id"] = mock_doc.pop("_id")
+        db.insert_file_record(mock_doc)
+    else:
+        await db.files.insert_one(file_doc)
+    
+    await attach_to_analysis(file_doc["_id"], file_doc.get("analysis_id"))
+
+
+async def attach_to_analysis(file_id: str, analysis_id: Optional[str]) -> None:
+    """Add a file to its analysis, if any, invalidating the analysis' cached dashboards"""
+    if not analysis_id:
+        return
+    
+    if settings.DISABLE_DATABASE:
+        await bump_analysis_revision(analysis_id)
+        return
+    
+    db = get_database()
+    await db.analyses.update_one(
+        {"_id": analysis_id},
+        {"$push": {"file_ids": file_id}, "$inc": {"revision": 1}}
+    )
+
+
+def session_parts_dir(session_id: str) -> str:
+    """Get the directory holding the parts of an upload session"""
+    return os.path.join(settings.UPLOAD_DIR, ".sessions", session_id)
+
+
+def session_part_path(session_id: str, part_number: int) -> str:
+    """Get the on-disk path of a single session part"""
+    return os.path.join(session_parts_dir(session_id), f"{part_number:05d}.part")
+
+
+def expected_part_size(upload_session: dict, part_number: int) -> int:
+    """Get the exact size a part must have; only the last part may be short"""
+    if part_number < upload_session["total_parts"]:
+        return upload_session["part_size"]
+    return upload_session["size"] - upload_session["part_size"] * (upload_session["total_parts"] - 1)
+
+
+async def move_session_status(session_id: str, session_doc: dict, current: FileStatus, new: FileStatus) -> bool:
+    """Move an upload session to a new status if it is still in the current one"""
+    db = get_database()
+    now = datetime.utcnow()
+    
+    if settings.DISABLE_DATABASE:
+        if session_doc["status"] != current:
+            return False
+        session_doc.update({"status": new, "updated_at": now})
+        return True
+    
+    result = await db.files.update_one(
+        {"_id": session_id, "status": current},
+        {"$set": {"status": new, "updated_at": now}}
+    )
+    return result.modified_count == 1
+
+
+def build_session_response(session_doc: dict) -> UploadSessionResponse:
+    """Convert a session file document to a response model"""
+    upload_session = session_doc["upload_session"]
+    received = sorted(int(part) for part in upload_session.get("parts", {}))
+    received_set = set(received)
+    
+    return UploadSessionResponse(
+        session_id=session_doc.get("_id", session_doc.get("id")),
+        filename=session_doc["filename"],
+        content_type=session_doc["content_type"],
+        size=upload_session["size"],
+        part_size=upload_session["part_size"],
+        total_parts=upload_session["total_parts"],
+        received_parts=received,
+        missing_parts=[n for n in range(1, upload_session["total_parts"] + 1) if n not in received_set],
+        received_bytes=sum(upload_session.get("parts", {}).values()),
+        status=session_doc["status"],
+        analysis_id=session_doc.get("analysis_id"),
+        expires_at=upload_session["expires_at"]
+    )
+
+
+async def get_upload_session(session_id: str, user_id: str, allow_expired: bool = False) -> dict:
+    """Get an open, unexpired upload session owned by the user"""
+    db = get_database()
+    
+    if settings.DISABLE_DATABASE:
+        session_doc = db.get_file_by_id(session_id)
+        if session_doc and (session_doc.get("user_id") != user_id or session_doc.get("status") not in SESSION_STATUSES):
+            session_doc = None
+    else:
+        session_doc = await db.files.find_one({
+            "_id": session_id,
+            "user_id": user_id,
+            "status": {"$in": SESSION_STATUSES}
+        })
+    
+    if not session_doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found"
+        )
+    
+    if session_doc["status"] == FileStatus.ASSEMBLING:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload session is already being committed"
+        )
+    
+    if not allow_expired and session_doc["upload_session"]["expires_at"] < datetime.utcnow():
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Upload session expired"
+        )
+    
+    return session_doc
+
+
+@router.post("/sessions", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    session_data: UploadSessionCreate,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Start a resumable multipart upload session"""
+    
+    # Validate file type and size up front
+    if session_data.content_type not in settings.ALLOWED_FILE_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type {session_data.content_type} not allowed"
+        )
+    
+    if session_data.size > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File size too large. Maximum size is {settings.MAX_FILE_SIZE} bytes"
+        )
+    
+    part_size = session_data.part_size or settings.UPLOAD_PART_SIZE
+    if part_size < settings.UPLOAD_MIN_PART_SIZE and part_size < session_data.size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Part size too small. Minimum size is {settings.UPLOAD_MIN_PART_SIZE} bytes"
+        )
+    part_size = min(part_size, session_data.size)
+    
+    # Verify analysis exists if provided
+    if session_data.analysis_id:
+        await verify_analysis_owner(session_data.analysis_id, current_user.id)
+    
+    db = get_database()
+    session_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    session_doc = {
+        "filename": session_data.filename,
+        "content_type": session_data.content_type,
+        "size": 0,
+        "user_id": current_user.id,
+        "analysis_id": session_data.analysis_id,
+        "bank": session_data.bank,
+        "status": FileStatus.UPLOADING,
+        "created_at": now,
+        "updated_at": now,
+        "upload_session": {
+            "size": session_data.size,
+            "part_size": part_size,
+            "total_parts": math.ceil(session_data.size / part_size),
+            "parts": {},
+            "expires_at": now + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+        }
+    }
+    
+    if settings.DISABLE_DATABASE:
+        session_doc["id"] = session_id
+        db.insert_file_record(session_doc)
+    else:
+        session_doc["_id"] = session_id
+        await db.files.insert_one(session_doc)
+    
+    return build_session_response(session_doc)
+
+
+@router.get("/sessions/{session_id}", response_model=UploadSessionResponse)
+async def get_upload_session_status(
+    session_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get which parts of an upload session have been received"""
+    session_doc = await get_upload_session(session_id, current_user.id)
+    return build_session_response(session_doc)
+
+
+@router.put("/sessions/{session_id}/parts/{part_number}", response_model=UploadSessionResponse)
+async def upload_session_part(
+    request: Request,
+    session_id: str,
+    part_number: int = Path(..., ge=1),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Upload one numbered part of a session as the raw request body"""
+    session_doc = await get_upload_session(session_id, current_user.id)
+    upload_session = session_doc["upload_session"]
+    
+    if part_number > upload_session["total_parts"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Part number must be between 1 and {upload_session['total_parts']}"
+        )
+    
+    part_size = expected_part_size(upload_session, part_number)
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) != part_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Part {part_number} must be exactly {part_size} bytes"
+        )
+    
+    # Stream the part straight to disk; re-sending a part overwrites it
+    part_path = session_part_path(session_id, part_number)
+    try:
+        received_size = await stream_chunks_to_file(request.stream(), part_path, max_size=part_size)
+    except UploadTooLargeError:
+        received_size = None
+    
+    if received_size != part_size:
+        remove_quietly(part_path)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Part {part_number} must be exactly {part_size} bytes"
+        )
+    
+    # Record the part; each part has its own key so parallel uploads don't conflict
+    db = get_database()
+    now = datetime.utcnow()
+    
+    if settings.DISABLE_DATABASE:
+        upload_session["parts"][str(part_number)] = received_size
+        session_doc["updated_at"] = now
+    else:
+        session_doc = await db.files.find_one_and_update(
+            {"_id": session_id, "status": FileStatus.UPLOADING},
+            {"$set": {
+                f"upload_session.parts.{part_number}": received_size,
+                "updated_at": now
+            }},
+            return_document=ReturnDocument.AFTER
+        )
+        
+        if not session_doc:
+            remove_quietly(part_path)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload session not found"
+            )
+    
+    return build_session_response(session_doc)
+
+
+@router.post("/sessions/{session_id}/commit", response_model=dict)
+async def commit_upload_session(
+    session_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Assemble all received parts into the final file"""
+    session_doc = await get_upload_session(session_id, current_user.id)
+    upload_session = session_doc["upload_session"]
+    
+    session_response = build_session_response(session_doc)
+    if session_response.missing_parts:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Missing parts: {session_response.missing_parts}"
+        )
+    
+    # Assemble parts into the blob store in chunks
+    part_paths = [
+        session_part_path(session_id, part_number)
+        for part_number in range(1, upload_session["total_parts"] + 1)
+    ]
+    
+    # Claim the session, so a concurrent commit or part upload is turned away
+    if not await move_session_status(session_id, session_doc, FileStatus.UPLOADING, FileStatus.ASSEMBLING):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload session is already being committed"
+        )
+    
+    try:
+        try:
+            digest, file_size, blob_path = await write_blob(iter_files_chunks(part_paths))
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Upload session parts are missing on disk"
+            )
+        
+        if file_size != upload_session["size"]:
+            await release_blob(digest)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Assembled file size does not match session size"
+            )
+    except BaseException:
+        # Hand the session back, so parts can be re-sent or it can be aborted
+        await move_session_status(session_id, session_doc, FileStatus.ASSEMBLING, FileStatus.UPLOADING)
+        raise
+    
+    remove_tree_quietly(session_parts_dir(session_id))
+    
+    # Turn the session document into a regular file document
+    db = get_database()
+    file_update = {
+        "unique_filename": os.path.basename(blob_path),
+        "size": file_size,
+        "sha256": digest,
+        "status": FileStatus.UPLOADED,
+        "upload_date": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+        "file_path": blob_path
+    }
+    
+    if settings.DISABLE_DATABASE:
+        session_doc.update(file_update)
+        session_doc.pop("upload_session", None)
+    else:
+        await db.files.update_one(
+            {"_id": session_id},
+            {"$set": file_update, "$unset": {"upload_session": ""}}
+        )
+    
+    await attach_to_analysis(session_id, session_doc.get("analysis_id"))
+    
+    # Parse tables and line items in the background
+    schedule_extraction(session_id)
+    
+    return {
+        "file_id": session_id,
+        "filename": session_doc["filename"],
+        "size": file_size,
+        "content_type": session_doc["content_type"],
+        "sha256": digest,
+        "message": "File uploaded successfully"
+    }
+
+
+@router.delete("/sessions/{session_id}", response_model=dict)
+async def abort_upload_session(
+    session_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Abort an upload session and discard its parts"""
+    session_doc = await get_upload_session(session_id, current_user.id, allow_expired=True)
+    
+    remove_tree_quietly(session_parts_dir(session_id))
+    
+    db = get_database()
+    if settings.DISABLE_DATABASE:
+        db.delete_file_record(session_doc["id"])
+    else:
+        await db.files.delete_one({"_id": session_id, "status": FileStatus.UPLOADING})
+    
+    return {"message": "Upload session aborted"}
+
+
+@router.post("/upload", response_model=dict)
+async def upload_file(
+    file: UploadFile = File(...),
+    analysis_id: Optional[str] = Form(None),
+    bank: Optional[str] = Form(None),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Upload a file"""
+    
+    # Validate file type
+    if file.content_type not in settings.ALLOWED_FILE_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type {file.content_type} not allowed"
+        )
+    
+    # Reject up front when the multipart parser already knows the size
+    if file.size is not None and file.size > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File size too large. Maximum size is {settings.MAX_FILE_SIZE} bytes"
+        )
+    
+    # Verify analysis exists if provided
+    if analysis_id:
+        await verify_analysis_owner(analysis_id, current_user.id)
+    
+    # Stream file into the blob store in chunks, hashing and enforcing the size limit as we go
+    try:
+        digest, file_size, blob_path = await write_blob(iter_upload_chunks(file))
+    except UploadTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File size too large. Maximum size is {settings.MAX_FILE_SIZE} bytes"
+        )
+    
+    file_id = str(uuid.uuid4())
+    await save_file_doc({
+        "_id": file_id,
+        "filename": file.filename,
+        "unique_filename": os.path.basename(blob_path),
+        "content_type": file.content_type,
+        "size": file_size,
+        "sha256": digest,
+        "user_id": current_user.id,
+        "analysis_id": analysis_id,
+        "bank": bank,
+        "status": FileStatus.UPLOADED,
+        "upload_date": datetime.utcnow(),
+        "file_path": blob_path
+    })
+    
+    # Parse tables and line items in the background
+    schedule_extraction(file_id)
+    
+    return {
+        "file_id": file_id,
+        "filename": file.filename,
+        "size": file_size,
+        "content_type": file.content_type,
+        "sha256": digest,
+        "message": "File uploaded successfully"
+    }
+
+
+@router.post("/link", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def link_file(
+    link_data: FileLinkRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Add an already stored document to an analysis by digest, without re-uploading it"""
+    db = get_database()
+    
+    # Only content the user has uploaded before can be linked
+    if settings.DISABLE_DATABASE:
+        source_doc = next(
+            (f for f in db.files if f.get("user_id") == current_user.id and f.get("sha256") == link_data.sha256),
+            None
+        )
+    else:
+        source_doc = await db.files.find_one({
+            "user_id": current_user.id,
+            "sha256": link_data.sha256,
+            "status": {"$nin": SESSION_STATUSES}
+        })
+    
+    if not source_doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No stored file with this digest"
+        )
+    
+    if link_data.analysis_id:
+        await verify_analysis_owner(link_data.analysis_id, current_user.id)
+    
+    # Hold a reference before checking the content, so it can't be unlinked in between
+    await acquire_blob(link_data.sha256, source_doc["size"])
+    if not os.path.exists(blob_path_for(link_data.sha256)):
+        await release_blob(link_data.sha256)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No stored file with this digest"
+        )
+    
+    file_id = str(uuid.uuid4())
+    filename = link_data.filename or source_doc["filename"]
+    await save_file_doc({
+        "_id": file_id,
+        "filename": filename,
+        "unique_filename": link_data.sha256,
+        "content_type": source_doc["content_type"],
+        "size": source_doc["size"],
+        "sha256": link_data.sha256,
+        "user_id": current_user.id,
+        "analysis_id": link_data.analysis_id,
+        "bank": source_doc.get("bank"),
+        "status": FileStatus.UPLOADED,
+        "upload_date": datetime.utcnow(),
+        "file_path": blob_path_for(link_data.sha256)
+    })
+    
+    # Parse tables and line items in the background
+    schedule_extraction(file_id)
+    
+    return {
+        "file_id": file_id,
+        "filename": filename,
+        "size": source_doc["size"],
+        "content_type": source_doc["content_type"],
+        "sha256": link_data.sha256,
+        "message": "File linked successfully"
+    }
+
+
+def mock_upload_order(file: dict) -> str:
+    """Sort key for mock files, whose upload dates are datetimes or ISO strings"""
+    upload_date = file.get("upload_date") or ""
+    return upload_date.isoformat() if isinstance(upload_date, datetime) else upload_date
+
+
+@router.get("/", response_model=List[dict])
+async def get_files(
+    response: Response,
+    analysis_id: Optional[str] = None,
+    size: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get user's files, newest first; the X-Next-Cursor header continues the list"""
+    db = get_database()
+    
+    if settings.DISABLE_DATABASE:
+        files = [
+            {key: value for key, value in file.items() if key != "file_path"}  # Exclude file_path for security
+            for file in db.get_files_by_user(current_user.id)
+            if file.get("status") not in SESSION_STATUSES
+            and (not analysis_id or file.get("analysis_id") == analysis_id)
+        ]
+        files.sort(key=mock_upload_order, reverse=True)
+        result = paginate_list(files, "upload_date", 1, size, cursor, id_field="id")
+        
+        if result.next_cursor:
+            response.headers["X-Next-Cursor"] = result.next_cursor
+        
+        return result.items
+    
+    # Build query, leaving out upload sessions that haven't been committed
+    query = {"user_id": current_user.id, "status": {"$nin": SESSION_STATUSES}}
+    
+    if analysis_id:
+        query["analysis_id"] = analysis_id
+    
+    # Get files
+    result = await paginate(
+        db.files,
+        query,
+        [("upload_date", -1)],
+        1,
+        size,
+        projection={"file_path": 0},  # Exclude file_path for security
+        cursor=cursor,
+        with_total=False
+    )
+    
+    if result.next_cursor:
+        response.headers["X-Next-Cursor"] = result.next_cursor
+    
+    return result.items
+
+
+@router.get("/{file_id}", response_class=FileResponse)
+async def download_file(
+    file_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Download a file"""
+    file_doc = await get_user_file(file_id, current_user.id)
+    
+    # Check if file exists on disk
+    if not os.path.exists(file_doc["file_path"]):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found on disk"
+        )
+    
+    return FileResponse(
+        path=file_doc["file_path"],
+        filename=file_doc["filename"],
+        media_type=file_doc.get("content_type")
+    )
+
+
+@router.delete("/{file_id}", response_model=dict)
+async def delete_file(
+    file_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Delete a file"""
+    db = get_database()
+    file_doc = await get_user_file(file_id, current_user.id)
+    
+    # Delete file metadata first, so an extraction finishing now drops its rows
+    if settings.DISABLE_DATABASE:
+        db.delete_file_record(file_id)
+    else:
+        await db.files.delete_one({"_id": file_id})
+    
+    # Remove rows extracted from the file
+    await delete_financial_rows(file_id, file_doc.get("analysis_id"))
+    
+    # Drop the blob reference; the content is only unlinked when no other file uses it
+    if file_doc.get("sha256"):
+        await release_blob(file_doc["sha256"])
+    else:
+        remove_quietly(file_doc["file_path"])
+    
+    # Remove file from analysis if associated
+    if file_doc.get("analysis_id") and not settings.DISABLE_DATABASE:
+        await db.analyses.update_one(
+            {"_id": file_doc["analysis_id"]},
+            {"$pull": {"file_ids": file_id}}
+        )
+    
+    return {"message": "File deleted successfully"}
+
+
+@router.get("/{file_id}/info", response_model=dict)
+async def get_file_info(
+    file_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get file information"""
+    file_doc = await get_user_file(file_id, current_user.id)
+    
+    # Exclude file_path for security
+    return {key: value for key, value in file_doc.items() if key != "file_path"}
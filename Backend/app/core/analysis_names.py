@@ -0,0 +1,53 @@
+from typing import Dict, Iterable, List
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.database import get_database
+
+
+UNKNOWN_ANALYSIS = "Unknown"
+
+
+class AnalysisNameResolver:
+    """Resolves analysis ids to names for display, in one query per batch
+
+    Names are cached in-process for ANALYSIS_NAME_CACHE_TTL seconds. Renames
+    invalidate the local entry; other workers pick them up when it expires.
+    """
+
+    def __init__(self):
+        self.cache = LRUCache(settings.ANALYSIS_NAME_CACHE_SIZE, ttl=settings.ANALYSIS_NAME_CACHE_TTL)
+
+    async def resolve(self, analysis_ids: Iterable[str]) -> Dict[str, str]:
+        """Get the names of analyses, fetching the uncached ones with a single $in"""
+        names = {}
+        missing = []
+        for analysis_id in set(analysis_ids):
+            name = self.cache.get(analysis_id)
+            if name is None:
+                missing.append(analysis_id)
+            else:
+                names[analysis_id] = name
+
+        if missing:
+            db = get_database()
+            cursor = db.analyses.find({"_id": {"$in": missing}}, {"name": 1})
+            for analysis in await cursor.to_list(length=len(missing)):
+                names[analysis["_id"]] = analysis["name"]
+                self.cache.set(analysis["_id"], analysis["name"])
+
+        return names
+
+    async def enrich(self, questions: List[dict]) -> List[dict]:
+        """Fill analysis_name on each question"""
+        names = await self.resolve(question["analysis_id"] for question in questions)
+        for question in questions:
+            question["analysis_name"] = names.get(question["analysis_id"], UNKNOWN_ANALYSIS)
+        return questions
+
+    def invalidate(self, analysis_id: str) -> None:
+        self.cache.delete(analysis_id)
+
+
+# Global analysis name resolver instance
+analysis_names = AnalysisNameResolver()
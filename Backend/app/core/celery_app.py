@@ -0,0 +1,80 @@
+"""Celery worker entry point for background jobs.
+
+Run with: celery -A app.core.celery_app worker --loglevel=info
+"""
+from typing import Optional
+import asyncio
+
+from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
+
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection
+from app.core.events import attach_client_manager
+from app.core.redis import connect_to_redis, close_redis_connection
+
+
+celery_app = Celery(
+    "fpa_analysis",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND
+)
+celery_app.conf.update(
+    task_serializer="json",
+    accept_content=["json"],
+    result_serializer="json",
+    task_acks_late=True,
+    worker_prefetch_multiplier=1
+)
+
+
+# One event loop per worker process, so the Mongo and Redis clients it
+# connects at startup stay usable by every task it runs
+worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def start_worker_services() -> None:
+    """Connect this worker to Mongo and Redis and send job events through Redis"""
+    # Importing the API registers every job handler
+    import app.api.v1.api  # noqa: F401
+
+    await connect_to_mongo()
+    await connect_to_redis()
+    attach_client_manager(write_only=True)
+
+
+async def stop_worker_services() -> None:
+    await close_mongo_connection()
+    await close_redis_connection()
+
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """Get this process' event loop, starting its services on first use"""
+    global worker_loop
+    if worker_loop is None:
+        worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(worker_loop)
+        worker_loop.run_until_complete(start_worker_services())
+    return worker_loop
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs) -> None:
+    get_worker_loop()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs) -> None:
+    global worker_loop
+    if worker_loop is not None:
+        worker_loop.run_until_complete(stop_worker_services())
+        worker_loop.close()
+        worker_loop = None
+
+
+@celery_app.task(name="jobs.run")
+def run_job_task(job_id: str) -> None:
+    """Run a queued job; retries are handled by the job manager itself"""
+    from app.core.jobs import job_manager
+
+    get_worker_loop().run_until_complete(job_manager.run(job_id))
@@ -0,0 +1,286 @@
+from contextlib import asynccontextmanager, contextmanager
+from loguru import logger
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+import asyncio
+import fcntl
+import json
+import os
+import re
+import shutil
+import uuid
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.database import get_database
+
+
+# Dictionary-encoded columns; values are float64, the rest are int32 codes
+CODE_COLUMNS = ("bank", "period", "statement", "metric")
+VALUE_COLUMN = "value"
+
+
+def period_sort_key(period: str) -> Tuple[int, int, str]:
+    """Order periods chronologically: quarters, halves, then full years"""
+    match = re.match(r"^Q([1-4]) (\d{4})$", period)
+    if match:
+        return int(match.group(2)), int(match.group(1)), period
+    match = re.match(r"^H([12]) (\d{4})$", period)
+    if match:
+        return int(match.group(2)), int(match.group(1)) * 2, period
+    match = re.match(r"^(?:FY )?(\d{4})$", period)
+    if match:
+        return int(match.group(1)), 9, period
+    return 9999, 0, period
+
+
+class FinancialFrame:
+    """Read-only columnar view of one analysis' financial rows
+
+    Every column is memory-mapped when the frame is opened, so the frame
+    keeps working after a newer version replaces and deletes its files.
+    Pages are only read from disk when accessed, so a query for one metric
+    doesn't deserialize the rest of the data.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "dictionaries.json")) as f:
+            self.dictionaries: Dict[str, List[str]] = json.load(f)
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+            for name in CODE_COLUMNS + (VALUE_COLUMN,)
+        }
+
+    @property
+    def banks(self) -> List[str]:
+        return self.dictionaries["bank"]
+
+    @property
+    def periods(self) -> List[str]:
+        return self.dictionaries["period"]
+
+    @property
+    def statements(self) -> List[str]:
+        return self.dictionaries["statement"]
+
+    @property
+    def metrics(self) -> List[str]:
+        return self.dictionaries["metric"]
+
+    def column(self, name: str) -> np.ndarray:
+        return self._columns[name]
+
+    def __len__(self) -> int:
+        return len(self.column(VALUE_COLUMN))
+
+    def codes_for(self, name: str, labels: Optional[Iterable[str]]) -> Optional[np.ndarray]:
+        """Translate labels to dictionary codes, ignoring unknown labels"""
+        if labels is None:
+            return None
+        lookup = {label: code for code, label in enumerate(self.dictionaries[name])}
+        return np.array([lookup[label] for label in labels if label in lookup], dtype=np.int32)
+
+    def mask(
+        self,
+        metrics: Optional[Iterable[str]] = None,
+        banks: Optional[Iterable[str]] = None,
+        periods: Optional[Iterable[str]] = None,
+        statements: Optional[Iterable[str]] = None
+    ) -> np.ndarray:
+        """Get a boolean row mask for the given filters"""
+        mask = np.ones(len(self), dtype=bool)
+        for name, labels in (("metric", metrics), ("bank", banks), ("period", periods), ("statement", statements)):
+            codes = self.codes_for(name, labels)
+            if codes is not None:
+                mask &= np.isin(self.column(name), codes)
+        return mask
+
+    def pivot(self, metrics: List[str]) -> np.ndarray:
+        """Get a dense (metric, period, bank) cube of values, NaN where missing"""
+        cube = np.full((len(metrics), len(self.periods), len(self.banks)), np.nan)
+        metric_codes = self.codes_for("metric", metrics)
+        if len(self) == 0 or metric_codes is None or len(metric_codes) == 0:
+            return cube
+
+        # Map stored metric codes to their position in the requested list
+        positions = np.full(len(self.metrics), -1, dtype=np.int64)
+        for position, metric in enumerate(metrics):
+            if metric in self.metrics:
+                positions[self.metrics.index(metric)] = position
+
+        row_positions = positions[self.column("metric")]
+        selected = row_positions >= 0
+        cube[
+            row_positions[selected],
+            self.column("period")[selected],
+            self.column("bank")[selected]
+        ] = self.column(VALUE_COLUMN)[selected]
+        return cube
+
+    def series(
+        self,
+        metrics: Optional[List[str]] = None,
+        banks: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Get values per metric and bank, aligned to the period axis"""
+        metrics = [m for m in (metrics or self.metrics) if m in self.metrics]
+        bank_indexes = [i for i, bank in enumerate(self.banks) if banks is None or bank in banks]
+        cube = self.pivot(metrics)
+
+        return {
+            "periods": self.periods,
+            "banks": [self.banks[i] for i in bank_indexes],
+            "metrics": metrics,
+            "series": {
+                metric: {
+                    self.banks[bank_index]: [
+                        None if np.isnan(value) else float(value)
+                        for value in cube[metric_index, :, bank_index]
+                    ]
+                    for bank_index in bank_indexes
+                }
+                for metric_index, metric in enumerate(metrics)
+            }
+        }
+
+
+class ColumnStore:
+    """Per-analysis columnar files under COLUMNAR_DIR
+
+    Each write goes to a fresh version directory and a CURRENT pointer is
+    swapped atomically, so readers holding memory maps are never disturbed.
+    Publishing takes a lock file, as API and job workers write the same
+    store.
+    """
+
+    def __init__(self, root: str = settings.COLUMNAR_DIR):
+        self.root = root
+
+    def analysis_dir(self, analysis_id: str) -> str:
+        return os.path.join(self.root, analysis_id)
+
+    def current_dir(self, analysis_id: str) -> Optional[str]:
+        """Get the directory of the current version, if any"""
+        try:
+            with open(os.path.join(self.analysis_dir(analysis_id), "CURRENT")) as f:
+                return os.path.join(self.analysis_dir(analysis_id), f.read().strip())
+        except FileNotFoundError:
+            return None
+
+    def load(self, analysis_id: str) -> Optional[FinancialFrame]:
+        """Open the current columnar data for an analysis"""
+        # Retry once in case a concurrent write swapped versions under us
+        for _ in range(2):
+            directory = self.current_dir(analysis_id)
+            if directory is None:
+                return None
+            try:
+                return FinancialFrame(directory)
+            except FileNotFoundError:
+                continue
+        return None
+
+    @contextmanager
+    def publish_lock(self, analysis_id: str) -> Iterator[None]:
+        """Lock an analysis' versions against every process writing the store"""
+        with open(os.path.join(self.analysis_dir(analysis_id), ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def write(self, analysis_id: str, rows: List[Dict[str, Any]]) -> str:
+        """Encode rows into columns and publish them as the current version"""
+        dictionaries = {
+            name: sorted({str(row[name]) for row in rows}, key=period_sort_key if name == "period" else None)
+            for name in CODE_COLUMNS
+        }
+
+        version = uuid.uuid4().hex
+        analysis_dir = self.analysis_dir(analysis_id)
+        directory = os.path.join(analysis_dir, version)
+        staging = os.path.join(analysis_dir, f".{version}")
+        os.makedirs(staging, exist_ok=True)
+
+        for name in CODE_COLUMNS:
+            lookup = {label: code for code, label in enumerate(dictionaries[name])}
+            codes = np.fromiter((lookup[str(row[name])] for row in rows), dtype=np.int32, count=len(rows))
+            np.save(os.path.join(staging, f"{name}.npy"), codes)
+
+        values = np.fromiter((row[VALUE_COLUMN] for row in rows), dtype=np.float64, count=len(rows))
+        np.save(os.path.join(staging, f"{VALUE_COLUMN}.npy"), values)
+
+        with open(os.path.join(staging, "dictionaries.json"), "w") as f:
+            json.dump(dictionaries, f)
+
+        # Publish, then drop every other published version. Versions still
+        # being written stay hidden under their dot names, so another
+        # process' write in progress is never pruned.
+        with self.publish_lock(analysis_id):
+            os.rename(staging, directory)
+            pointer_temp = os.path.join(analysis_dir, f".CURRENT.{version}")
+            with open(pointer_temp, "w") as f:
+                f.write(version)
+            os.replace(pointer_temp, os.path.join(analysis_dir, "CURRENT"))
+
+            for entry in os.listdir(analysis_dir):
+                entry_path = os.path.join(analysis_dir, entry)
+                if entry != version and not entry.startswith(".") and os.path.isdir(entry_path):
+                    shutil.rmtree(entry_path, ignore_errors=True)
+
+        return directory
+
+    def delete(self, analysis_id: str) -> None:
+        """Remove all columnar data for an analysis"""
+        shutil.rmtree(self.analysis_dir(analysis_id), ignore_errors=True)
+
+
+# Global column store instance
+column_store = ColumnStore()
+
+# Serializes rebuilds of the same analysis within this process: the lock of
+# each analysis being rebuilt and how many rebuilds hold or wait for it
+rebuild_locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+
+
+@asynccontextmanager
+async def rebuild_lock(analysis_id: str) -> AsyncIterator[None]:
+    """Hold an analysis' rebuild lock, forgetting it once no rebuild needs it"""
+    lock, users = rebuild_locks.get(analysis_id, (asyncio.Lock(), 0))
+    rebuild_locks[analysis_id] = (lock, users + 1)
+    try:
+        async with lock:
+            yield
+    finally:
+        lock, users = rebuild_locks[analysis_id]
+        if users == 1:
+            del rebuild_locks[analysis_id]
+        else:
+            rebuild_locks[analysis_id] = (lock, users - 1)
+
+
+async def rebuild_analysis_columns(analysis_id: str) -> None:
+    """Rebuild an analysis' columnar data from its extracted rows"""
+    db = get_database()
+    projection = {"_id": 0, "bank": 1, "period": 1, "statement": 1, "metric": 1, "value": 1}
+
+    async with rebuild_lock(analysis_id):
+        if settings.DISABLE_DATABASE:
+            rows = db.get_financial_rows_by_analysis(analysis_id)
+        else:
+            rows = await db.financial_rows.find({"analysis_id": analysis_id}, projection).to_list(length=None)
+
+        if not rows:
+            await asyncio.to_thread(column_store.delete, analysis_id)
+            return
+
+        await asyncio.to_thread(column_store.write, analysis_id, rows)
+
+    logger.info(f"✅ Rebuilt columnar data for analysis {analysis_id} ({len(rows)} rows)")
+
+
+def load_financial_frame(analysis_id: str) -> Optional[FinancialFrame]:
+    """Open an analysis' columnar financial data"""
+    return column_store.load(analysis_id)
@@ -1,98 +1,112 @@
-from pydantic_settings import BaseSettings
-from typing import List, Optional
-import os
-
-
-class Settings(BaseSettings):
-    # Application
-    PROJECT_NAME: str = "FP&A Intelligence API"
-    VERSION: str = "1.0.0"
-    ENVIRONMENT: str = "development"
-    DEBUG: bool = True
-    PORT: int = 5000
-    
-    # Security
-    SECRET_KEY: str = "dev-secret-key-change-in-production"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
-    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
-    ALGORITHM: str = "HS256"
-    
-    # CORS
-    ALLOWED_HOSTS: List[str] = ["*"]
-    FRONTEND_URL: str = "http://localhost:3000"
-    
-    # Database - Optional for development
-    MONGODB_URI: str = "mongodb://localhost:27017/fpa-analysis"
-    DATABASE_NAME: str = "fpa-analysis"
-    DISABLE_DATABASE: bool = True  # Set to True to run without MongoDB
-    
-    # Redis - Optional for development  
-    REDIS_URL: str = "redis://localhost:6379"
-    REDIS_PASSWORD: Optional[str] = None
-    DISABLE_REDIS: bool = True  # Set to True to run without Redis
-    
-    # File Upload
-    MAX_FILE_SIZE: int = 50 * 1024 * 1024  # 50MB
-    UPLOAD_DIR: str = "uploads"
-    ALLOWED_FILE_TYPES: List[str] = [
-        "application/pdf",
-        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        "application/vnd.ms-excel",
-        "text/csv"
-    ]
-    
-    # External APIs
-    OPENAI_API_KEY: Optional[str] = None
-    OPENAI_MODEL: str = "gpt-4"
-    OPENAI_MAX_TOKENS: int = 2000
-    
-    # Rate Limiting
-    RATE_LIMIT_PER_MINUTE: int = 60
-    RATE_LIMIT_BURST: int = 10
-    
-    # Logging
-    LOG_LEVEL: str = "INFO"
-    LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    
-    # Cache
-    CACHE_TTL: int = 3600  # 1 hour
-    
-    # Background Jobs
-    CELERY_BROKER_URL: str = "redis://localhost:6379/0"
-    CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
-    
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
-
-
-# Global settings instance
-settings = Settings()
-
-# Auto-detect if we should disable external dependencies
-if settings.ENVIRONMENT == "development":
-    # Try to detect if MongoDB/Redis are available
-    try:
-        import socket
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(1)
-        result = sock.connect_ex(('localhost', 27017))
-        sock.close()
-        if result != 0:
-            settings.DISABLE_DATABASE = True
-    except:
-        settings.DISABLE_DATABASE = True
-    
-    try:
-        import socket
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(1)
-        result = sock.connect_ex(('localhost', 6379))
-        sock.close()
-        if result != 0:
-            settings.DISABLE_REDIS = True
-    except:
-        settings.DISABLE_REDIS = True
-
-# Ensure upload directory exists
+from pydantic_settings import BaseSettings
+from typing import List, Optional
+import os
+
+
+class Settings(BaseSettings):
+    # Application
+    PROJECT_NAME: str = "FP&A Intelligence API"
+    VERSION: str = "1.0.0"
+    ENVIRONMENT: str = "development"
+    DEBUG: bool = True
+    PORT: int = 5000
+    
+    # Security
+    SECRET_KEY: str = "dev-secret-key-change-in-production"
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    ALGORITHM: str = "HS256"
+    PASSWORD_HASH_WORKERS: int = 4  # Threads running bcrypt off the event loop
+    PASSWORD_HASH_MAX_QUEUE: int = 64  # Waiting calls beyond this are rejected with 503
+    
+    # CORS
+    ALLOWED_HOSTS: List[str] = ["*"]
+    FRONTEND_URL: str = "http://localhost:3000"
+    
+    # Database - Optional for development
+    MONGODB_URI: str = "mongodb://localhost:27017/fpa-analysis"
+    DATABASE_NAME: str = "fpa-analysis"
+    DISABLE_DATABASE: bool = True  # Set to True to run without MongoDB
+    
+    # Redis - Optional for development  
+    REDIS_URL: str = "redis://localhost:6379"
+    REDIS_PASSWORD: Optional[str] = None
+    DISABLE_REDIS: bool = True  # Set to True to run without Redis
+    REDIS_MAX_CONNECTIONS: int = 50  # per process; callers beyond this wait for a free connection
+    REDIS_POOL_TIMEOUT: float = 2.0  # seconds to wait for a free connection before failing
+    REDIS_SOCKET_TIMEOUT: float = 2.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 2.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # seconds idle before a connection is pinged on reuse
+    REDIS_RETRY_ATTEMPTS: int = 3  # retries of a command after a connection error or timeout
+    REDIS_RETRY_BACKOFF_BASE: float = 0.05  # seconds, doubled per retry
+    REDIS_RETRY_BACKOFF_CAP: float = 1.0
+    DEPENDENCY_PROBE_TIMEOUT: float = 0.5  # seconds to reach MongoDB/Redis before development falls back to mocks
+    
+    # File Upload
+    MAX_FILE_SIZE: int = 50 * 1024 * 1024  # 50MB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1MB chunks for streamed uploads
+    UPLOAD_PART_SIZE: int = 8 * 1024 * 1024  # 8MB default part size for upload sessions
+    UPLOAD_MIN_PART_SIZE: int = 1024 * 1024  # 1MB
+    UPLOAD_SESSION_TTL_HOURS: int = 24
+    
+    # Document Extraction
+    EXTRACTION_WORKERS: int = 2
+    COLUMNAR_DIR: str = "data/columnar"
+    UPLOAD_DIR: str = "uploads"
+    ALLOWED_FILE_TYPES: List[str] = [
+        "application/pdf",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "application/vnd.ms-excel",
+        "text/csv"
+    ]
+    
+    # External APIs
+    OPENAI_API_KEY: Optional[str] = None
+    OPENAI_MODEL: str = "gpt-4"
+    OPENAI_MAX_TOKENS: int = 2000
+    
+    # Rate Limiting
+    RATE_LIMIT_PER_MINUTE: int = 60
+    RATE_LIMIT_BURST: int = 10
+    LOGIN_MAX_FAILURES_PER_ACCOUNT: int = 5
+    LOGIN_MAX_FAILURES_PER_IP: int = 20
+    LOGIN_FAILURE_WINDOW: int = 900  # seconds failed logins are counted before the counters reset
+    
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    
+    # Cache
+    CACHE_TTL: int = 3600  # 1 hour
+    DASHBOARD_CACHE_SIZE: int = 256  # In-process entries when Redis is disabled
+    USER_CACHE_SIZE: int = 1024
+    USER_CACHE_TTL: int = 300  # seconds an authenticated user is reused without a lookup
+    TOKEN_CACHE_SIZE: int = 4096  # Verified access/refresh tokens kept until they expire
+    ANALYSIS_NAME_CACHE_SIZE: int = 1024
+    ANALYSIS_NAME_CACHE_TTL: int = 300  # seconds a resolved analysis name is reused
+    
+    # Pagination
+    PAGINATION_COUNT_LIMIT: int = 10000  # list totals stop counting here when an estimate is requested
+    
+    # Search
+    SEARCH_MIN_PREFIX: int = 2  # shorter search words are ignored
+    SEARCH_MAX_PREFIX: int = 15  # longer words are indexed and matched by their first characters
+    SEARCH_MAX_TERMS: int = 8  # words of a search query beyond this are ignored
+    
+    # Background Jobs
+    CELERY_BROKER_URL: str = "redis://localhost:6379/0"
+    CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
+    JOB_QUEUE: str = "local"  # "local" runs jobs in-process, "celery" hands them to workers
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_DELAY: int = 5  # seconds, doubled after each failed attempt
+    
+    class Config:
+        env_file = ".env"
+        case_sensitive = True
+
+
+# Global settings instance
+settings = Settings()
+
+# Ensure upload directory exists
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True) 
\ No newline at end of file
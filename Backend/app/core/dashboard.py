@@ -0,0 +1,332 @@
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import re
+import warnings
+
+import numpy as np
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.database import get_database
+from app.core.redis import cache_get, cache_set
+from app.core.columnar import FinancialFrame
+from app.core.parsers import snake_case
+
+
+DASHBOARD_SECTIONS = ("income_statement", "balance_sheet", "cash_flow", "kpis", "mda")
+
+# Period kinds growth can be computed over, finest first
+PERIOD_KINDS = ("quarter", "half", "year")
+
+# Metrics each computed section reads from the column store
+SECTION_METRICS = {
+    "income_statement": [
+        "total_revenue", "net_interest_income", "noninterest_income",
+        "noninterest_expense", "earning_assets"
+    ],
+    "balance_sheet": [
+        "total_assets", "total_loans", "total_deposits",
+        "cet1_capital", "risk_weighted_assets"
+    ],
+    "cash_flow": ["operating_cash_flow", "investing_cash_flow", "financing_cash_flow"],
+    "kpis": ["nonperforming_loans", "total_loans", "hqla", "net_cash_outflows", "customers"],
+}
+
+# Static sample returned while an analysis has no extracted data yet
+SAMPLE_DASHBOARD = {
+    "income_statement": {
+        "revenue_growth": [
+            {"quarter": "Q1 2023", "our_bank": 4.2, "bank_of_america": 4.8, "wells_fargo": 4.1},
+            {"quarter": "Q2 2023", "our_bank": 4.5, "bank_of_america": 4.9, "wells_fargo": 4.3},
+            {"quarter": "Q3 2023", "our_bank": 4.8, "bank_of_america": 5.1, "wells_fargo": 4.5},
+            {"quarter": "Q4 2023", "our_bank": 5.1, "bank_of_america": 5.3, "wells_fargo": 4.7}
+        ],
+        "net_interest_margin": 5.6,
+        "efficiency_ratio": 62
+    },
+    "balance_sheet": {
+        "asset_growth": 8.2,
+        "capital_ratio": 14.8,
+        "loan_to_deposit": 78,
+        "deposit_growth": 5.4
+    },
+    "cash_flow": {
+        "operating_cash_flow": 1250.5,
+        "investment_cash_flow": -320.8,
+        "financing_cash_flow": -180.2
+    },
+    "kpis": {
+        "npl_ratio": 0.7,
+        "customer_acquisition_cost": 225,
+        "lcr": 132,
+        "customer_growth": 7.8
+    },
+    "mda": {
+        "strategic_priorities": ["Digital transformation", "Market expansion", "Risk management"],
+        "risk_factors": ["Credit risk", "Interest rate risk", "Regulatory compliance"],
+        "outlook": "Positive growth expected in Q1 2025"
+    }
+}
+
+
+def ratio(numerator: np.ndarray, denominator: np.ndarray, scale: float = 100.0) -> np.ndarray:
+    """Element-wise ratio, NaN where either side is missing or zero"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = numerator / denominator * scale
+    result[~np.isfinite(result)] = np.nan
+    return result
+
+
+def period_position(period: str) -> Optional[Tuple[str, int]]:
+    """Get the kind of a period and its place in the sequence of that kind
+
+    Quarters, halves and years each count up by one per period, so the
+    period before ("quarter", n) is ("quarter", n - 1). Labels that aren't
+    a recognized period, like "unknown", have no position.
+    """
+    match = re.match(r"^Q([1-4]) (\d{4})$", period)
+    if match:
+        return "quarter", int(match.group(2)) * 4 + int(match.group(1)) - 1
+    match = re.match(r"^H([12]) (\d{4})$", period)
+    if match:
+        return "half", int(match.group(2)) * 2 + int(match.group(1)) - 1
+    match = re.match(r"^(?:FY )?(\d{4})$", period)
+    if match:
+        return "year", int(match.group(1))
+    return None
+
+
+def growth_kind(periods: List[str]) -> Optional[str]:
+    """The period kind growth is reported for: the most common, preferring finer kinds"""
+    counts = Counter(position[0] for position in map(period_position, periods) if position is not None)
+    if not counts:
+        return None
+    return max(PERIOD_KINDS, key=lambda kind: counts[kind])
+
+
+def growth(values: np.ndarray, periods: List[str], kind: Optional[str]) -> Tuple[np.ndarray, List[str]]:
+    """Growth in percent over the previous period of the same kind
+
+    Returns a (period, bank) matrix and its period labels, for each period
+    of the kind whose previous period is present. Growth never compares a
+    quarter with a year, or spans a gap in the data.
+    """
+    rows = {period_position(period): row for row, period in enumerate(periods)}
+    current, previous, labels = [], [], []
+    for row, period in enumerate(periods):
+        position = period_position(period)
+        if position is None or position[0] != kind:
+            continue
+        prior = rows.get((kind, position[1] - 1))
+        if prior is not None:
+            current.append(row)
+            previous.append(prior)
+            labels.append(period)
+    return ratio(values[current] - values[previous], np.abs(values[previous])), labels
+
+
+def latest(values: np.ndarray) -> np.ndarray:
+    """Most recent non-missing value per bank from a (period, bank) matrix"""
+    if values.shape[0] == 0:
+        return np.full(values.shape[1:], np.nan)
+    present = ~np.isnan(values)
+    last_index = values.shape[0] - 1 - np.argmax(present[::-1], axis=0)
+    result = values[last_index, np.arange(values.shape[1])]
+    result[~present.any(axis=0)] = np.nan
+    return result
+
+
+def to_number(value: float) -> Optional[float]:
+    """Round for JSON, mapping NaN to None"""
+    return None if value is None or np.isnan(value) else round(float(value), 2)
+
+
+def peer_average(values: np.ndarray) -> Optional[float]:
+    """Average across banks, ignoring missing values"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return to_number(np.nanmean(values)) if values.size else None
+
+
+def annualization_factors(periods: List[str]) -> np.ndarray:
+    """Factor that turns a flow for each period into an annual rate"""
+    factors = []
+    for period in periods:
+        if re.match(r"^Q[1-4] ", period):
+            factors.append(4.0)
+        elif re.match(r"^H[12] ", period):
+            factors.append(2.0)
+        else:
+            factors.append(1.0)
+    return np.array(factors)[:, None]
+
+
+class DashboardEngine:
+    """Computes dashboard sections for every bank and period in one pass
+
+    All metrics a section needs are pivoted into a (metric, period, bank)
+    cube once, and every ratio is computed on whole matrices.
+    """
+
+    def __init__(self, frame: FinancialFrame):
+        self.frame = frame
+        self.periods = frame.periods
+        self.banks = frame.banks
+        self.bank_keys = [snake_case(bank) for bank in self.banks]
+        self.growth_kind = growth_kind(self.periods)
+
+    def growth(self, values: np.ndarray) -> Tuple[np.ndarray, List[str]]:
+        return growth(values, self.periods, self.growth_kind)
+
+    def cube(self, section: str) -> Dict[str, np.ndarray]:
+        """Get a (period, bank) matrix per metric of a section"""
+        metrics = SECTION_METRICS[section]
+        values = self.frame.pivot(metrics)
+        return {metric: values[index] for index, metric in enumerate(metrics)}
+
+    def by_bank(self, values: np.ndarray) -> Dict[str, Optional[float]]:
+        return {bank: to_number(value) for bank, value in zip(self.banks, values)}
+
+    def time_series(self, matrix: np.ndarray, periods: List[str]) -> List[Dict[str, Any]]:
+        """Rows of {quarter, <bank>: value} for charting"""
+        return [
+            {"quarter": period, **{key: to_number(value) for key, value in zip(self.bank_keys, row)}}
+            for period, row in zip(periods, matrix)
+        ]
+
+    def income_statement(self) -> Dict[str, Any]:
+        m = self.cube("income_statement")
+        revenue = m["total_revenue"]
+        # Fall back to NII + non-interest income where total revenue isn't reported
+        derived = m["net_interest_income"] + np.nan_to_num(m["noninterest_income"])
+        revenue = np.where(np.isnan(revenue), derived, revenue)
+
+        nim = ratio(m["net_interest_income"] * annualization_factors(self.periods), m["earning_assets"])
+        efficiency = ratio(m["noninterest_expense"], revenue)
+
+        return {
+            "revenue_growth": self.time_series(*self.growth(revenue)),
+            "net_interest_margin": peer_average(latest(nim)),
+            "efficiency_ratio": peer_average(latest(efficiency)),
+            "net_interest_margin_by_bank": self.by_bank(latest(nim)),
+            "efficiency_ratio_by_bank": self.by_bank(latest(efficiency))
+        }
+
+    def balance_sheet(self) -> Dict[str, Any]:
+        m = self.cube("balance_sheet")
+        loan_to_deposit = ratio(m["total_loans"], m["total_deposits"])
+        capital_ratio = ratio(m["cet1_capital"], m["risk_weighted_assets"])
+        asset_growth = latest(self.growth(m["total_assets"])[0])
+        deposit_growth = latest(self.growth(m["total_deposits"])[0])
+
+        return {
+            "asset_growth": peer_average(asset_growth),
+            "capital_ratio": peer_average(latest(capital_ratio)),
+            "loan_to_deposit": peer_average(latest(loan_to_deposit)),
+            "deposit_growth": peer_average(deposit_growth),
+            "loan_to_deposit_by_bank": self.by_bank(latest(loan_to_deposit)),
+            "capital_ratio_by_bank": self.by_bank(latest(capital_ratio))
+        }
+
+    def cash_flow(self) -> Dict[str, Any]:
+        m = self.cube("cash_flow")
+        return {
+            "operating_cash_flow": peer_average(latest(m["operating_cash_flow"])),
+            "investment_cash_flow": peer_average(latest(m["investing_cash_flow"])),
+            "financing_cash_flow": peer_average(latest(m["financing_cash_flow"])),
+            "operating_cash_flow_by_bank": self.by_bank(latest(m["operating_cash_flow"]))
+        }
+
+    def kpis(self) -> Dict[str, Any]:
+        m = self.cube("kpis")
+        npl = ratio(m["nonperforming_loans"], m["total_loans"])
+        lcr = ratio(m["hqla"], m["net_cash_outflows"])
+        customer_growth = latest(self.growth(m["customers"])[0])
+
+        return {
+            "npl_ratio": peer_average(latest(npl)),
+            "lcr": peer_average(latest(lcr)),
+            "customer_growth": peer_average(customer_growth),
+            "customer_acquisition_cost": None,
+            "npl_ratio_by_bank": self.by_bank(latest(npl)),
+            "lcr_by_bank": self.by_bank(latest(lcr))
+        }
+
+
+def compute_mda(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """MD&A comes from generated insights rather than the numbers"""
+    insights = analysis.get("ai_insights") or {}
+    if not insights:
+        return SAMPLE_DASHBOARD["mda"]
+    return {
+        "strategic_priorities": insights.get("recommendations", []),
+        "risk_factors": insights.get("risk_factors", []),
+        "outlook": insights.get("summary", "")
+    }
+
+
+def compute_dashboard(
+    frame: Optional[FinancialFrame],
+    analysis: Dict[str, Any],
+    sections: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Compute the requested dashboard sections for an analysis"""
+    sections = sections or list(DASHBOARD_SECTIONS)
+    engine = DashboardEngine(frame) if frame is not None and len(frame) else None
+
+    dashboard = {}
+    for section in sections:
+        if section == "mda":
+            dashboard[section] = compute_mda(analysis)
+        elif engine is None:
+            dashboard[section] = SAMPLE_DASHBOARD[section]
+        else:
+            dashboard[section] = getattr(engine, section)()
+    return dashboard
+
+
+# Fallback for computed dashboards when Redis is disabled
+dashboard_lru = LRUCache(settings.DASHBOARD_CACHE_SIZE)
+
+
+def dashboard_cache_key(analysis_id: str, revision: int, sections: Optional[List[str]] = None) -> str:
+    """Build a cache key; a new revision never matches an older entry"""
+    key = f"dashboard:{analysis_id}:{revision}"
+    if sections:
+        key += ":" + ",".join(sorted(sections))
+    return key
+
+
+async def get_cached_dashboard(key: str) -> Optional[Dict[str, Any]]:
+    """Get a computed dashboard from Redis or the in-process cache"""
+    if settings.DISABLE_REDIS:
+        return dashboard_lru.get(key)
+    return await cache_get(key)
+
+
+async def set_cached_dashboard(key: str, dashboard: Dict[str, Any]) -> None:
+    """Store a computed dashboard in Redis or the in-process cache"""
+    if settings.DISABLE_REDIS:
+        dashboard_lru.set(key, dashboard)
+        return
+    await cache_set(key, dashboard)
+
+
+async def get_analysis_revision(analysis_id: str) -> int:
+    """Get the revision counter of an analysis"""
+    db = get_database()
+    if settings.DISABLE_DATABASE:
+        return db.get_analysis_revision(analysis_id)
+    analysis = await db.analyses.find_one({"_id": analysis_id}, {"revision": 1})
+    return (analysis or {}).get("revision", 0)
+
+
+async def bump_analysis_revision(analysis_id: Optional[str]) -> None:
+    """Invalidate cached dashboards after an analysis or its data changed"""
+    if not analysis_id:
+        return
+    db = get_database()
+    if settings.DISABLE_DATABASE:
+        db.bump_analysis_revision(analysis_id)
+        return
+    await db.analyses.update_one({"_id": analysis_id}, {"$inc": {"revision": 1}})
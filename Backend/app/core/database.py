@@ -1,109 +1,204 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import MongoClient
-from loguru import logger
-from typing import Optional
-
-from app.core.config import settings
-
-
-class Database:
-    client: Optional[AsyncIOMotorClient] = None
-    database = None
-
-
-db = Database()
-
-
-async def connect_to_mongo():
-    """Create database connection"""
-    if settings.DISABLE_DATABASE:
-        logger.warning("🔄 Database disabled in development mode - using mock data")
-        return
-        
-    try:
-        logger.info("🔄 Connecting to MongoDB...")
-        db.client = AsyncIOMotorClient(settings.MONGODB_URI)
-        
-        # Test the connection
-        await db.client.admin.command('ping')
-        
-        db.database = db.client[settings.DATABASE_NAME]
-        logger.info(f"✅ Connected to MongoDB: {settings.DATABASE_NAME}")
-        
-        # Create indexes
-        await create_indexes()
-        
-    except Exception as e:
-        logger.error(f"❌ Failed to connect to MongoDB: {e}")
-        if settings.ENVIRONMENT == "development":
-            logger.warning("🔄 Running in development mode without database - using mock data")
-            settings.DISABLE_DATABASE = True
-            return
-        raise
-
-
-async def close_mongo_connection():
-    """Close database connection"""
-    if settings.DISABLE_DATABASE or not db.client:
-        return
-        
-    try:
-        if db.client:
-            db.client.close()
-            logger.info("✅ MongoDB connection closed")
-    except Exception as e:
-        logger.error(f"❌ Error closing MongoDB connection: {e}")
-
-
-async def create_indexes():
-    """Create database indexes for optimal performance"""
-    if settings.DISABLE_DATABASE or not db.database:
-        return
-        
-    try:
-        # Users collection indexes
-        await db.database.users.create_index("email", unique=True)
-        await db.database.users.create_index("username", unique=True)
-        await db.database.users.create_index("created_at")
-        
-        # Analyses collection indexes
-        await db.database.analyses.create_index("user_id")
-        await db.database.analyses.create_index("created_at")
-        await db.database.analyses.create_index("status")
-        await db.database.analyses.create_index([("name", "text"), ("description", "text")])
-        
-        # Market research questions indexes
-        await db.database.market_questions.create_index("user_id")
-        await db.database.market_questions.create_index("analysis_id")
-        await db.database.market_questions.create_index("status")
-        await db.database.market_questions.create_index("created_at")
-        
-        # Files collection indexes
-        await db.database.files.create_index("user_id")
-        await db.database.files.create_index("analysis_id")
-        await db.database.files.create_index("filename")
-        await db.database.files.create_index("upload_date")
-        
-        logger.info("✅ Database indexes created successfully")
-        
-    except Exception as e:
-        logger.error(f"❌ Error creating indexes: {e}")
-
-
-def get_database():
-    """Get database instance"""
-    if settings.DISABLE_DATABASE:
-        # Import here to avoid circular imports
-        from app.core.mock_data import mock_data_service
-        return mock_data_service
-    return db.database
-
-
-async def get_collection(collection_name: str):
-    """Get a specific collection"""
-    if settings.DISABLE_DATABASE or not db.database:
-        return None
-    return db.database[collection_name]
-
-
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+from loguru import logger
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.search import SEARCH_SPECS, reindex
+
+
+class Database:
+    client: Optional[AsyncIOMotorClient] = None
+    database = None
+
+
+db = Database()
+
+
+# Indexes per collection, as (keys, create_index options). Compound indexes
+# put equality filters first, then the sort key, then _id as the tiebreaker
+# that cursors resume from. `python -m app.core.query_plans` checks the
+# endpoint queries against them.
+INDEX_PLAN: Dict[str, List[Tuple[Any, Dict[str, Any]]]] = {
+    "users": [
+        ("email", {"unique": True}),
+        ("username", {"unique": True}),
+        ([("created_at", 1), ("_id", 1)], {}),
+        ([("role", 1), ("created_at", 1), ("_id", 1)], {}),
+        ("search_terms", {}),
+    ],
+    "analyses": [
+        ("created_at", {}),
+        ("status", {}),
+        # Lists sort by any of these within a user
+        *(([("user_id", 1), (field, 1), ("_id", 1)], {}) for field in ("created_at", "updated_at", "name", "status")),
+        ([("user_id", 1), ("status", 1), ("created_at", 1), ("_id", 1)], {}),
+        ([("user_id", 1), ("search_terms", 1)], {}),
+    ],
+    "market_questions": [
+        ("analysis_id", {}),
+        ("status", {}),
+        ("created_at", {}),
+        *(([("user_id", 1), (field, 1), ("_id", 1)], {}) for field in ("created_at", "status", "analysis_id")),
+        ([("user_id", 1), ("_id", 1)], {}),
+        ([("user_id", 1), ("status", 1), ("created_at", 1), ("_id", 1)], {}),
+        ([("user_id", 1), ("analysis_id", 1), ("created_at", 1), ("_id", 1)], {}),
+        ([("user_id", 1), ("search_terms", 1)], {}),
+    ],
+    "files": [
+        ("analysis_id", {}),
+        ("filename", {}),
+        ("upload_date", {}),
+        ([("user_id", 1), ("upload_date", 1), ("_id", 1)], {}),
+        ([("user_id", 1), ("analysis_id", 1), ("upload_date", 1), ("_id", 1)], {}),
+    ],
+    "financial_rows": [
+        ("file_id", {}),
+        ([("analysis_id", 1), ("metric", 1)], {}),
+    ],
+    "jobs": [
+        ([("user_id", 1), ("created_at", -1)], {}),
+        ("payload.analysis_id", {}),
+    ],
+}
+
+# Indexes no longer in INDEX_PLAN, dropped from existing databases by name
+OBSOLETE_INDEXES: Dict[str, List[str]] = {
+    # Replaced by the search_terms prefix index (app/core/search.py)
+    "analyses": ["name_text_description_text"],
+}
+
+
+async def connect_to_mongo():
+    """Create database connection"""
+    if settings.DISABLE_DATABASE:
+        logger.warning("🔄 Database disabled in development mode - using mock data")
+        return
+        
+    try:
+        logger.info("🔄 Connecting to MongoDB...")
+        db.client = AsyncIOMotorClient(settings.MONGODB_URI)
+        
+        # Test the connection
+        await db.client.admin.command('ping')
+        
+        db.database = db.client[settings.DATABASE_NAME]
+        logger.info(f"✅ Connected to MongoDB: {settings.DATABASE_NAME}")
+        
+        # Create indexes
+        await create_indexes()
+        await move_blob_references()
+        await backfill_search_terms()
+        
+    except Exception as e:
+        logger.error(f"❌ Failed to connect to MongoDB: {e}")
+        if settings.ENVIRONMENT == "development":
+            logger.warning("🔄 Running in development mode without database - using mock data")
+            settings.DISABLE_DATABASE = True
+            return
+        raise
+
+
+async def close_mongo_connection():
+    """Close database connection"""
+    if settings.DISABLE_DATABASE or not db.client:
+        return
+        
+    try:
+        if db.client:
+            db.client.close()
+            logger.info("✅ MongoDB connection closed")
+    except Exception as e:
+        logger.error(f"❌ Error closing MongoDB connection: {e}")
+
+
+async def create_indexes():
+    """Create database indexes for optimal performance"""
+    if settings.DISABLE_DATABASE or db.database is None:
+        return
+        
+    try:
+        for collection, indexes in INDEX_PLAN.items():
+            for keys, options in indexes:
+                await db.database[collection].create_index(keys, **options)
+        
+        for collection, names in OBSOLETE_INDEXES.items():
+            existing = await db.database[collection].index_information()
+            for name in names:
+                if name in existing:
+                    await db.database[collection].drop_index(name)
+        
+        logger.info("✅ Database indexes created successfully")
+        
+    except Exception as e:
+        logger.error(f"❌ Error creating indexes: {e}")
+
+
+async def move_blob_references():
+    """Move blob reference counts kept as "blob:<sha256>" files documents into the blobs collection"""
+    if settings.DISABLE_DATABASE or db.database is None:
+        return
+    
+    moved = 0
+    try:
+        # Each legacy document is removed before its count is added, so
+        # workers starting together never count it twice
+        while True:
+            legacy = await db.database.files.find_one_and_delete({"_id": {"$regex": "^blob:"}})
+            if legacy is None:
+                break
+            await db.database.blobs.update_one(
+                {"_id": legacy["sha256"]},
+                {
+                    "$inc": {"ref_count": legacy.get("ref_count", 0)},
+                    "$setOnInsert": {
+                        "size": legacy.get("size"),
+                        "file_path": legacy.get("file_path"),
+                        "created_at": legacy.get("created_at")
+                    }
+                },
+                upsert=True
+            )
+            moved += 1
+        
+        if moved:
+            logger.info(f"✅ Moved {moved} blob reference counts to the blobs collection")
+    except Exception as e:
+        logger.error(f"❌ Error moving blob reference counts: {e}")
+
+
+async def backfill_search_terms():
+    """Fill in search_terms for documents written before search used them
+
+    Only documents without search_terms are read, so once every document
+    has them this is a single index lookup per collection.
+    """
+    if settings.DISABLE_DATABASE or db.database is None:
+        return
+    
+    try:
+        for spec in SEARCH_SPECS:
+            updated = await reindex(db.database, spec)
+            if updated:
+                logger.info(f"✅ Filled in search terms of {updated} {spec.collection} documents")
+    except Exception as e:
+        logger.error(f"❌ Error filling in search terms: {e}")
+
+
+def get_database():
+    """Get database instance"""
+    if settings.DISABLE_DATABASE:
+        # Import here to avoid circular imports
+        from app.core.mock_data import mock_data_service
+        return mock_data_service
+    return db.database
+
+
+async def get_collection(collection_name: str):
+    """Get a specific collection"""
+    if settings.DISABLE_DATABASE or db.database is None:
+        return None
+    return db.database[collection_name]
+
+
 # Using mock_data_service for mocked data when database is disabled 
\ No newline at end of file
@@ -0,0 +1,89 @@
+from fastapi.encoders import jsonable_encoder
+from loguru import logger
+from typing import Any, Dict, Optional
+import socketio
+
+from app.core.config import settings
+
+
+# Event names pushed to clients
+ANALYSIS_STATUS = "analysis:status"
+JOB_UPDATE = "job:update"
+FILE_STATUS = "file:status"
+MARKET_RESEARCH_RESPONSE = "market_research:response"
+
+
+def create_client_manager(write_only: bool = False) -> Optional[socketio.AsyncRedisManager]:
+    """Fan events out through Redis pub/sub so every worker reaches its clients"""
+    if settings.DISABLE_REDIS:
+        return None
+    redis_options = {"password": settings.REDIS_PASSWORD} if settings.REDIS_PASSWORD else None
+    return socketio.AsyncRedisManager(
+        settings.REDIS_URL,
+        channel="fpa-events",
+        write_only=write_only,
+        redis_options=redis_options
+    )
+
+
+sio = socketio.AsyncServer(
+    async_mode="asgi",
+    cors_allowed_origins="*" if "*" in settings.ALLOWED_HOSTS else settings.ALLOWED_HOSTS
+)
+
+
+def attach_client_manager(write_only: bool = False) -> None:
+    """Switch to the Redis manager once startup has settled whether Redis is up
+
+    Must run before the first socket connects, which initializes the manager.
+    Processes that serve no sockets, like Celery workers, only publish.
+    """
+    manager = create_client_manager(write_only)
+    if manager is not None and not sio.manager_initialized:
+        sio.manager = manager
+        sio.manager.set_server(sio)
+
+
+def user_room(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+@sio.event
+async def connect(sid: str, environ: Dict[str, Any], auth: Optional[Dict[str, Any]] = None):
+    """Authenticate the socket with the same bearer token as the REST API"""
+    # Imported here, security pulls in the database layer
+    from app.core.security import get_current_active_user, get_current_user, principal_from_token
+
+    token = (auth or {}).get("token")
+    if not token:
+        raise socketio.exceptions.ConnectionRefusedError("Authentication required")
+
+    try:
+        user = await get_current_active_user(
+            await get_current_user(await principal_from_token(token))
+        )
+    except Exception:
+        raise socketio.exceptions.ConnectionRefusedError("Could not validate credentials")
+
+    await sio.save_session(sid, {"user_id": user.id})
+    await sio.enter_room(sid, user_room(user.id))
+    logger.info(f"🔌 Socket {sid} connected for user {user.id}")
+
+
+@sio.event
+async def disconnect(sid: str):
+    logger.info(f"🔌 Socket {sid} disconnected")
+
+
+async def emit_to_user(user_id: Optional[str], event: str, data: Dict[str, Any]) -> None:
+    """Push an event to every socket of a user; failures never break the caller"""
+    if not user_id:
+        return
+    try:
+        await sio.emit(event, jsonable_encoder(data), room=user_room(user_id))
+    except Exception as e:
+        logger.error(f"❌ Failed to emit {event} to user {user_id}: {e}")
+
+
+# ASGI app serving the Socket.IO endpoint, mounted by main.py
+socket_app = socketio.ASGIApp(sio, socketio_path="")
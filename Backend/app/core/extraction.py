@@ -0,0 +1,180 @@
+from concurrent.futures import ProcessPoolExecutor
+from loguru import logger
+from typing import Any, Dict, Optional, Set
+from datetime import datetime
+import asyncio
+import multiprocessing
+
+from app.core.config import settings
+from app.core.database import get_database
+from app.core.columnar import rebuild_analysis_columns
+from app.core.dashboard import bump_analysis_revision
+from app.core.events import FILE_STATUS, emit_to_user
+from app.core.parsers import extract_document
+from app.models.file import FileStatus
+
+
+class ExtractionManager:
+    """Runs document extraction in a process pool, off the event loop"""
+
+    def __init__(self):
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.tasks: Set[asyncio.Task] = set()
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        """Create the worker pool on first use"""
+        if self.executor is None:
+            # Spawn rather than fork so workers don't inherit the event loop or open sockets
+            self.executor = ProcessPoolExecutor(
+                max_workers=settings.EXTRACTION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"✅ Extraction pool started with {settings.EXTRACTION_WORKERS} workers")
+        return self.executor
+
+    def schedule(self, file_id: str) -> None:
+        """Queue extraction for a file without waiting for it"""
+        task = asyncio.create_task(self.process_file(file_id))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def process_file(self, file_id: str) -> None:
+        """Extract a file, store its rows and update its status
+
+        Any failure once the file is processing marks it failed with the
+        error. Rows of a file deleted during extraction are not kept.
+        """
+        file_doc = await get_file_doc(file_id)
+        if not file_doc:
+            logger.warning(f"⚠️ Extraction skipped, file {file_id} not found")
+            return
+
+        await update_file_doc(file_id, {"status": FileStatus.PROCESSING}, file_doc)
+
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self.get_executor(),
+                extract_document,
+                file_doc["file_path"],
+                file_doc["content_type"],
+                file_doc["filename"],
+                file_doc.get("bank")
+            )
+
+            if not await store_financial_rows(file_doc, result["rows"]):
+                logger.warning(f"⚠️ File {file_id} was deleted during extraction, dropped its rows")
+                return
+            if file_doc.get("analysis_id"):
+                await rebuild_analysis_columns(file_doc["analysis_id"])
+                await bump_analysis_revision(file_doc["analysis_id"])
+
+            await update_file_doc(file_id, {
+                "status": FileStatus.PROCESSED,
+                "processed_at": datetime.utcnow(),
+                "metadata": result["metadata"]
+            }, file_doc)
+        except Exception as e:
+            logger.error(f"❌ Extraction failed for file {file_id}: {e}")
+            await update_file_doc(file_id, {
+                "status": FileStatus.FAILED,
+                "metadata": {"error": str(e)}
+            }, file_doc)
+            return
+
+        logger.info(f"✅ Extracted {len(result['rows'])} rows from file {file_id}")
+
+    async def shutdown(self) -> None:
+        """Wait for running extractions and stop the worker pool"""
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+
+# Global extraction manager instance
+extraction_manager = ExtractionManager()
+
+
+async def get_file_doc(file_id: str) -> Optional[Dict[str, Any]]:
+    """Get file metadata from the database or mock data"""
+    db = get_database()
+    if settings.DISABLE_DATABASE:
+        return db.get_file_by_id(file_id)
+    return await db.files.find_one({"_id": file_id})
+
+
+async def update_file_doc(file_id: str, update_data: Dict[str, Any], file_doc: Optional[Dict[str, Any]] = None) -> None:
+    """Update file metadata and push extraction progress to the owner"""
+    db = get_database()
+    update_data["updated_at"] = datetime.utcnow()
+    if settings.DISABLE_DATABASE:
+        db.update_file_record(file_id, update_data)
+    else:
+        await db.files.update_one({"_id": file_id}, {"$set": update_data})
+
+    if file_doc:
+        await emit_to_user(file_doc.get("user_id"), FILE_STATUS, {
+            "file_id": file_id,
+            "analysis_id": file_doc.get("analysis_id"),
+            **update_data
+        })
+
+
+async def store_financial_rows(file_doc: Dict[str, Any], rows: list) -> bool:
+    """Replace the normalized financial rows extracted from a file, unless it was deleted
+
+    delete_file removes the file record before its rows, so checking the
+    record again after the write catches a delete that ran concurrently.
+    Returns whether the rows were kept.
+    """
+    db = get_database()
+    file_id = file_doc.get("_id", file_doc.get("id"))
+    if await get_file_doc(file_id) is None:
+        return False
+
+    stored_rows = [
+        {
+            **row,
+            "file_id": file_id,
+            "analysis_id": file_doc.get("analysis_id"),
+            "user_id": file_doc.get("user_id")
+        }
+        for row in rows
+    ]
+
+    if settings.DISABLE_DATABASE:
+        db.replace_financial_rows(file_id, stored_rows)
+    else:
+        await db.financial_rows.delete_many({"file_id": file_id})
+        if stored_rows:
+            await db.financial_rows.insert_many(stored_rows)
+
+    if await get_file_doc(file_id) is None:
+        await delete_financial_rows(file_id, file_doc.get("analysis_id"))
+        return False
+    return True
+
+
+async def delete_financial_rows(file_id: str, analysis_id: Optional[str] = None) -> None:
+    """Remove the rows extracted from a deleted file"""
+    db = get_database()
+    if settings.DISABLE_DATABASE:
+        db.replace_financial_rows(file_id, [])
+    else:
+        await db.financial_rows.delete_many({"file_id": file_id})
+    
+    if analysis_id:
+        await rebuild_analysis_columns(analysis_id)
+        await bump_analysis_revision(analysis_id)
+
+
+def schedule_extraction(file_id: str) -> None:
+    """Queue background extraction for an uploaded file"""
+    extraction_manager.schedule(file_id)
+
+
+async def shutdown_extraction() -> None:
+    """Stop the extraction worker pool"""
+    await extraction_manager.shutdown()
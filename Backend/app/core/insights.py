@@ -0,0 +1,101 @@
+from loguru import logger
+from typing import Any, Dict, List
+import json
+
+from app.core.config import settings
+
+
+INSIGHT_KEYS = ("summary", "key_findings", "recommendations", "risk_factors")
+
+SYSTEM_PROMPT = (
+    "You are a banking FP&A analyst. Given computed dashboard metrics for a bank and its peers, "
+    "reply with a JSON object with keys summary (string), key_findings, recommendations and "
+    "risk_factors (lists of short strings)."
+)
+
+
+def heuristic_insights(analysis: Dict[str, Any], dashboard: Dict[str, Any]) -> Dict[str, Any]:
+    """Rule-based insights used when no language model is configured"""
+    income = dashboard.get("income_statement", {})
+    balance = dashboard.get("balance_sheet", {})
+    kpis = dashboard.get("kpis", {})
+
+    findings: List[str] = []
+    recommendations: List[str] = []
+    risks: List[str] = []
+
+    efficiency = income.get("efficiency_ratio")
+    if efficiency is not None:
+        if efficiency <= 60:
+            findings.append(f"Efficient cost base with an efficiency ratio of {efficiency:.1f}%")
+        else:
+            findings.append(f"Efficiency ratio of {efficiency:.1f}% is above the 60% benchmark")
+            recommendations.append("Optimize cost structure to bring the efficiency ratio below 60%")
+
+    margin = income.get("net_interest_margin")
+    if margin is not None:
+        findings.append(f"Net interest margin of {margin:.2f}%")
+        if margin < 3:
+            risks.append("Compressed net interest margin")
+
+    loan_to_deposit = balance.get("loan_to_deposit")
+    if loan_to_deposit is not None:
+        if loan_to_deposit > 90:
+            risks.append(f"High loan-to-deposit ratio of {loan_to_deposit:.1f}% limits liquidity headroom")
+            recommendations.append("Grow core deposits to fund loan growth")
+        elif loan_to_deposit < 70:
+            recommendations.append("Deploy excess deposits into higher-yielding loans")
+
+    capital_ratio = balance.get("capital_ratio")
+    if capital_ratio is not None and capital_ratio < 10:
+        risks.append(f"CET1 ratio of {capital_ratio:.1f}% leaves a thin capital buffer")
+
+    npl_ratio = kpis.get("npl_ratio")
+    if npl_ratio is not None and npl_ratio > 1.5:
+        risks.append(f"Non-performing loan ratio of {npl_ratio:.2f}% signals rising credit risk")
+
+    lcr = kpis.get("lcr")
+    if lcr is not None and lcr < 100:
+        risks.append(f"Liquidity coverage ratio of {lcr:.0f}% is below the regulatory minimum")
+
+    return {
+        "summary": f"{analysis.get('name', 'Analysis')}: {len(findings)} findings, {len(risks)} risk factors identified",
+        "key_findings": findings,
+        "recommendations": recommendations,
+        "risk_factors": risks
+    }
+
+
+async def model_insights(analysis: Dict[str, Any], dashboard: Dict[str, Any]) -> Dict[str, Any]:
+    """Ask the configured OpenAI model to write insights from the computed metrics"""
+    from openai import AsyncOpenAI
+
+    client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    context = {
+        "analysis": {key: analysis.get(key) for key in ("name", "description", "period", "competitors")},
+        "metrics": {section: values for section, values in dashboard.items() if section != "mda"}
+    }
+    response = await client.chat.completions.create(
+        model=settings.OPENAI_MODEL,
+        max_tokens=settings.OPENAI_MAX_TOKENS,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": json.dumps(context, default=str)}
+        ]
+    )
+
+    insights = json.loads(response.choices[0].message.content)
+    return {key: insights.get(key, "" if key == "summary" else []) for key in INSIGHT_KEYS}
+
+
+async def generate_insights(analysis: Dict[str, Any], dashboard: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate insights for an analysis from its computed dashboard"""
+    if not settings.OPENAI_API_KEY:
+        return heuristic_insights(analysis, dashboard)
+
+    try:
+        return await model_insights(analysis, dashboard)
+    except json.JSONDecodeError as e:
+        # A malformed reply isn't worth a retry; fall back to the rules
+        logger.warning(f"⚠️ Model returned invalid insights, using heuristics: {e}")
+        return heuristic_insights(analysis, dashboard)
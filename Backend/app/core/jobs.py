@@ -0,0 +1,224 @@
+from loguru import logger
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from datetime import datetime
+import asyncio
+import uuid
+
+from app.core.config import settings
+from app.core.database import get_database
+from app.core.events import JOB_UPDATE, emit_to_user
+from app.models.job import JobStatus
+
+
+JobHandler = Callable[["JobContext"], Awaitable[Optional[Dict[str, Any]]]]
+FailureHandler = Callable[["JobContext", str], Awaitable[None]]
+
+# Handlers by job type, registered with @job_handler
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+FAILURE_HANDLERS: Dict[str, FailureHandler] = {}
+
+# Jobs in these states are done and never run again
+FINISHED_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED)
+
+
+def job_handler(job_type: str, on_failure: Optional[FailureHandler] = None):
+    """Register the coroutine that runs jobs of a given type"""
+    def decorator(func: JobHandler) -> JobHandler:
+        JOB_HANDLERS[job_type] = func
+        if on_failure is not None:
+            FAILURE_HANDLERS[job_type] = on_failure
+        return func
+    return decorator
+
+
+def use_celery() -> bool:
+    """Celery workers need shared state, so they're only used with Mongo and Redis"""
+    return settings.JOB_QUEUE == "celery" and not settings.DISABLE_DATABASE and not settings.DISABLE_REDIS
+
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Get a job document from the database or mock data"""
+    db = get_database()
+    if settings.DISABLE_DATABASE:
+        return db.get_job(job_id)
+    return await db.jobs.find_one({"_id": job_id})
+
+
+async def update_job(job_id: str, update_data: Dict[str, Any], user_id: Optional[str] = None) -> None:
+    """Update a job document and push the change to its owner"""
+    db = get_database()
+    update_data["updated_at"] = datetime.utcnow()
+    if settings.DISABLE_DATABASE:
+        db.update_job(job_id, update_data)
+    else:
+        await db.jobs.update_one({"_id": job_id}, {"$set": update_data})
+
+    await emit_to_user(user_id, JOB_UPDATE, {"id": job_id, **update_data})
+
+
+class JobContext:
+    """What a handler sees of its job: payload, owner and progress reporting"""
+
+    def __init__(self, job: Dict[str, Any]):
+        self.id = job["_id"]
+        self.type = job["type"]
+        self.user_id = job["user_id"]
+        self.payload = job.get("payload", {})
+        self.attempt = job.get("attempts", 0)
+
+    async def progress(self, percent: int, message: Optional[str] = None) -> None:
+        """Record how far the job has got"""
+        await update_job(self.id, {"progress": max(0, min(100, int(percent))), "message": message}, self.user_id)
+
+
+class JobManager:
+    """Queues background jobs and runs them with retries
+
+    Jobs run as asyncio tasks in this process unless JOB_QUEUE is "celery",
+    in which case they are handed to Celery workers sharing the same store.
+    """
+
+    def __init__(self):
+        self.tasks: Set[asyncio.Task] = set()
+
+    async def enqueue(self, job_type: str, user_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a job and start it in the background"""
+        if job_type not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job type {job_type}")
+
+        now = datetime.utcnow()
+        job = {
+            "_id": str(uuid.uuid4()),
+            "type": job_type,
+            "user_id": user_id,
+            "payload": payload,
+            "status": JobStatus.QUEUED,
+            "progress": 0,
+            "message": None,
+            "attempts": 0,
+            "max_attempts": settings.JOB_MAX_ATTEMPTS,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+            "started_at": None,
+            "finished_at": None
+        }
+
+        db = get_database()
+        if settings.DISABLE_DATABASE:
+            db.insert_job(job.copy())
+        else:
+            await db.jobs.insert_one(job)
+
+        if use_celery():
+            from app.core.celery_app import run_job_task
+            try:
+                await asyncio.to_thread(run_job_task.delay, job["_id"])
+            except Exception as e:
+                logger.error(f"❌ Could not queue {job_type} job {job['_id']}: {e}")
+                job.update(await self.fail(job, f"Could not queue job: {e}"))
+                return job
+        else:
+            task = asyncio.create_task(self.run(job["_id"]))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+        logger.info(f"✅ Queued {job_type} job {job['_id']}")
+        return job
+
+    async def run(self, job_id: str) -> None:
+        """Run a job to completion, retrying with exponential backoff"""
+        job = await get_job(job_id)
+        if not job:
+            logger.warning(f"⚠️ Job {job_id} not found")
+            return
+
+        if job["status"] in FINISHED_STATUSES:
+            # Celery acknowledges late, so a job can be delivered again after it finished
+            logger.info(f"⏭️ Job {job_id} already finished, skipping")
+            return
+
+        handler = JOB_HANDLERS.get(job["type"])
+        if handler is None:
+            await update_job(job_id, {"status": JobStatus.FAILED, "error": f"Unknown job type {job['type']}"}, job["user_id"])
+            return
+
+        try:
+            await self.attempt(job, handler)
+        except asyncio.CancelledError:
+            # Stopped by shutdown; fail the job rather than leave it running forever
+            logger.warning(f"⚠️ Job {job_id} interrupted by shutdown")
+            await self.fail(job, "Interrupted by server shutdown")
+            raise
+
+    async def attempt(self, job: Dict[str, Any], handler: JobHandler) -> None:
+        """Run a job's remaining attempts, failing it once they're used up"""
+        job_id = job["_id"]
+        delay = settings.JOB_RETRY_DELAY
+        error = None
+        for attempt in range(job.get("attempts", 0) + 1, job["max_attempts"] + 1):
+            await update_job(job_id, {
+                "status": JobStatus.RUNNING,
+                "attempts": attempt,
+                "started_at": datetime.utcnow()
+            }, job["user_id"])
+            job["attempts"] = attempt
+
+            try:
+                result = await handler(JobContext(job))
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+                logger.error(f"❌ Job {job_id} attempt {attempt} failed: {error}")
+                if attempt < job["max_attempts"]:
+                    await update_job(job_id, {"status": JobStatus.RETRYING, "error": error}, job["user_id"])
+                    await asyncio.sleep(delay)
+                    delay *= 2
+                continue
+
+            await update_job(job_id, {
+                "status": JobStatus.COMPLETED,
+                "progress": 100,
+                "message": "Completed",
+                "result": result,
+                "error": None,
+                "finished_at": datetime.utcnow()
+            }, job["user_id"])
+            logger.info(f"✅ Job {job_id} completed")
+            return
+
+        await self.fail(job, error)
+
+    async def fail(self, job: Dict[str, Any], error: str) -> Dict[str, Any]:
+        """Mark a job failed and let its type clean up, returning the update"""
+        update = {
+            "status": JobStatus.FAILED,
+            "error": error,
+            "finished_at": datetime.utcnow()
+        }
+        await update_job(job["_id"], update, job["user_id"])
+        on_failure = FAILURE_HANDLERS.get(job["type"])
+        if on_failure is not None:
+            await on_failure(JobContext(job), error)
+        return update
+
+    async def shutdown(self) -> None:
+        """Cancel in-process jobs that are still running; each is marked failed"""
+        for task in list(self.tasks):
+            task.cancel()
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+# Global job manager instance
+job_manager = JobManager()
+
+
+async def enqueue_job(job_type: str, user_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Queue a background job"""
+    return await job_manager.enqueue(job_type, user_id, payload)
+
+
+async def shutdown_jobs() -> None:
+    """Stop in-process background jobs, failing those that were interrupted"""
+    await job_manager.shutdown()
@@ -0,0 +1,67 @@
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+
+# Password hashing pool
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth",
+    "Password hash/verify calls waiting for a worker"
+)
+PASSWORD_HASH_IN_FLIGHT = Gauge(
+    "password_hash_in_flight",
+    "Password hash/verify calls running on the worker pool"
+)
+PASSWORD_HASH_WAIT_SECONDS = Histogram(
+    "password_hash_wait_seconds",
+    "Time password hash/verify calls spent queued",
+    ["operation"]
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds",
+    "Time spent hashing or verifying a password",
+    ["operation"]
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Password hash/verify calls rejected because the queue was full",
+    ["operation"]
+)
+
+# Login failure counters
+LOGIN_FAILURES = Counter(
+    "login_failures_total",
+    "Failed login attempts",
+    ["reason"]
+)
+LOGIN_BLOCKED = Counter(
+    "login_blocked_total",
+    "Login attempts rejected before any lookup because of earlier failures",
+    ["scope"]
+)
+
+# Redis connection pool
+REDIS_POOL_IN_USE = Gauge(
+    "redis_pool_connections_in_use",
+    "Redis connections checked out of the pool"
+)
+REDIS_POOL_IDLE = Gauge(
+    "redis_pool_connections_idle",
+    "Open Redis connections waiting in the pool"
+)
+REDIS_POOL_WAITS = Counter(
+    "redis_pool_waits_total",
+    "Redis commands that had to wait for a free connection"
+)
+REDIS_POOL_WAIT_SECONDS = Histogram(
+    "redis_pool_wait_seconds",
+    "Time Redis commands spent waiting for a free connection"
+)
+REDIS_ERRORS = Counter(
+    "redis_errors_total",
+    "Redis commands that failed after retries",
+    ["command"]
+)
+
+
+def render_metrics() -> tuple:
+    """Get the Prometheus exposition body and its content type"""
+    return generate_latest(), CONTENT_TYPE_LATEST
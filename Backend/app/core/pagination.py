@@ -0,0 +1,239 @@
+from bson import json_util
+from fastapi import HTTPException, status
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import base64
+import math
+
+from app.core.config import settings
+
+
+class Page(NamedTuple):
+    items: List[dict]
+    total: Optional[int]
+    total_estimated: bool
+    next_cursor: Optional[str] = None
+
+    def pages(self, size: int) -> Optional[int]:
+        return math.ceil(self.total / size) if self.total is not None else None
+
+
+def keyset_sort(sort: List[Tuple[str, int]]) -> Dict[str, int]:
+    """Get a sort spec with _id appended to break ties, so pages never overlap or skip documents"""
+    sort_spec = dict(sort)
+    sort_spec.setdefault("_id", sort[-1][1] if sort else 1)
+    return sort_spec
+
+
+def encode_cursor(sort_field: str, document: dict, id_field: str = "_id") -> str:
+    """Encode the position after a document as an opaque token"""
+    position = json_util.dumps({"f": sort_field, "v": document.get(sort_field), "id": document[id_field]})
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort_field: str) -> Tuple[Any, Any]:
+    """Get the (sort value, _id) a cursor token points after"""
+    try:
+        position = json_util.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if position["f"] != sort_field:
+            raise ValueError("cursor was issued for a different sort")
+        return position["v"], position["id"]
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def after_cursor(query: Dict[str, Any], sort_field: str, direction: int, token: str) -> Dict[str, Any]:
+    """Narrow a query to the documents after a cursor, in sort order
+
+    MongoDB sorts null and missing values before all others, but $gt and
+    $lt never match them, so they get their own branches: after a null,
+    ascending moves on to the non-null values and descending stays among
+    the nulls; after a value, descending still has every null to come.
+    """
+    value, last_id = decode_cursor(token, sort_field)
+    op = "$gt" if direction == 1 else "$lt"
+    if sort_field == "_id":
+        after = {"_id": {op: last_id}}
+    elif value is None:
+        branches = [{sort_field: None, "_id": {op: last_id}}]
+        if direction == 1:
+            branches.insert(0, {sort_field: {"$ne": None}})
+        after = {"$or": branches}
+    else:
+        branches = [{sort_field: {op: value}}, {sort_field: value, "_id": {op: last_id}}]
+        if direction == -1:
+            branches.append({sort_field: None})
+        after = {"$or": branches}
+    return {"$and": [query, after]} if query else after
+
+
+def cursor_projection(projection: Optional[Dict[str, Any]], sort_field: str) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """Make a projection return the fields a cursor is built from
+
+    Returns the projection and the fields it had left out, which page_of()
+    strips again once the cursor is encoded.
+    """
+    if not projection:
+        return projection, []
+
+    projection = dict(projection)
+    inclusive = any(value for field, value in projection.items() if field != "_id")
+    hidden = []
+    for field in dict.fromkeys([sort_field, "_id"]):
+        if field in projection and not projection[field]:
+            del projection[field]
+            hidden.append(field)
+        elif field not in projection and field != "_id" and inclusive:
+            projection[field] = 1
+            hidden.append(field)
+    return projection or None, hidden
+
+
+def page_of(
+    items: List[dict],
+    size: int,
+    sort_field: str,
+    total: Optional[int],
+    total_estimated: bool = False,
+    hidden: Sequence[str] = (),
+    id_field: str = "_id"
+) -> Page:
+    """Trim the one-extra look-ahead document, which tells whether another page follows"""
+    next_cursor = encode_cursor(sort_field, items[size - 1], id_field) if len(items) > size else None
+    items = items[:size]
+    for item in items:
+        for field in hidden:
+            item.pop(field, None)
+    return Page(items, total, total_estimated, next_cursor)
+
+
+def paginate_list(
+    items: List[dict],
+    sort_field: str,
+    page: int,
+    size: int,
+    cursor: Optional[str] = None,
+    id_field: str = "_id"
+) -> Page:
+    """Page through in-memory data already in sort order, as paginate() does a collection
+
+    For mock data. A cursor resumes after the document it was issued for,
+    so it is only invalid once that document is gone.
+    """
+    if cursor:
+        _, last_id = decode_cursor(cursor, sort_field)
+        position = next((index for index, item in enumerate(items) if item[id_field] == last_id), None)
+        if position is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        return page_of(items[position + 1:position + size + 2], size, sort_field, None, id_field=id_field)
+
+    skip = (page - 1) * size
+    return page_of(items[skip:skip + size + 1], size, sort_field, len(items), id_field=id_field)
+
+
+def facet_pipeline(
+    query: Dict[str, Any],
+    sort_spec: Dict[str, int],
+    skip: int,
+    size: int,
+    projection: Optional[Dict[str, Any]] = None,
+    estimate_total: bool = False,
+    rank: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """The aggregation paginate() runs for a page with its total"""
+    items_pipeline = [{"$skip": skip}, {"$limit": size + 1}]
+    if projection:
+        items_pipeline.append({"$project": projection})
+
+    count_pipeline = [{"$count": "count"}]
+    if estimate_total:
+        count_pipeline.insert(0, {"$limit": settings.PAGINATION_COUNT_LIMIT})
+
+    pipeline = [{"$match": query}]
+    if rank:
+        pipeline.append({"$addFields": rank})
+    pipeline.extend([
+        {"$sort": sort_spec},
+        {"$facet": {"items": items_pipeline, "total": count_pipeline}}
+    ])
+    return pipeline
+
+
+def ranked_pipeline(
+    query: Dict[str, Any],
+    rank: Dict[str, Any],
+    sort_spec: Dict[str, int],
+    size: int,
+    projection: Optional[Dict[str, Any]] = None,
+    after: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """The aggregation paginate() runs for a ranked page without its total"""
+    pipeline = [{"$match": query}, {"$addFields": rank}]
+    if after:
+        pipeline.append({"$match": after})
+    pipeline.extend([{"$sort": sort_spec}, {"$limit": size + 1}])
+    if projection:
+        pipeline.append({"$project": projection})
+    return pipeline
+
+
+async def paginate(
+    collection,
+    query: Dict[str, Any],
+    sort: List[Tuple[str, int]],
+    page: int,
+    size: int,
+    projection: Optional[Dict[str, Any]] = None,
+    estimate_total: bool = False,
+    cursor: Optional[str] = None,
+    with_total: bool = True,
+    rank: Optional[Dict[str, Any]] = None
+) -> Page:
+    """Fetch one page of matches and their total in a single aggregation
+
+    The sort runs before $facet so it can still use an index; the page and
+    the count then share one pass over the matches. With estimate_total,
+    counting stops at PAGINATION_COUNT_LIMIT, and an unfiltered collection
+    is counted from its metadata instead.
+
+    Every page carries a next_cursor. Passing it back seeks straight past
+    the previous page on the (sort field, _id) index instead of skipping,
+    so deep pages cost the same as the first; those pages leave out the
+    total, which the client already has. with_total=False leaves it out of
+    every page.
+
+    rank is an $addFields spec for computed sort keys, such as a search
+    relevance; those queries always run as an aggregation.
+    """
+    sort_spec = keyset_sort(sort)
+    sort_field, direction = next(iter(sort_spec.items()))
+    projection, hidden = cursor_projection(projection, sort_field)
+
+    if cursor or not with_total:
+        if rank:
+            after = after_cursor({}, sort_field, direction, cursor) if cursor else None
+            pipeline = ranked_pipeline(query, rank, sort_spec, size, projection, after)
+            items = await collection.aggregate(pipeline).to_list(length=size + 1)
+            return page_of(items, size, sort_field, None, hidden=hidden)
+        if cursor:
+            query = after_cursor(query, sort_field, direction, cursor)
+        items = await collection.find(query, projection).sort(list(sort_spec.items())).limit(size + 1).to_list(length=size + 1)
+        return page_of(items, size, sort_field, None, hidden=hidden)
+
+    skip = (page - 1) * size
+
+    if estimate_total and not query and not rank:
+        items = await collection.find({}, projection).sort(list(sort_spec.items())).skip(skip).limit(size + 1).to_list(length=size + 1)
+        return page_of(items, size, sort_field, await collection.estimated_document_count(), True, hidden)
+
+    pipeline = facet_pipeline(query, sort_spec, skip, size, projection, estimate_total, rank)
+    result = await collection.aggregate(pipeline).to_list(length=1)
+    facet = result[0] if result else {"items": [], "total": []}
+    total = facet["total"][0]["count"] if facet["total"] else 0
+
+    return page_of(facet["items"], size, sort_field, total, estimate_total and total >= settings.PAGINATION_COUNT_LIMIT, hidden)
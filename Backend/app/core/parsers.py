@@ -0,0 +1,336 @@
+"""Financial document parsers.
+
+These functions run inside extraction worker processes, so they only use
+plain Python data in and out and keep heavy imports local.
+"""
+from typing import Any, Dict, List, Optional
+import os
+import re
+
+
+CSV_TYPES = {"text/csv"}
+EXCEL_TYPES = {
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/vnd.ms-excel"
+}
+PDF_TYPES = {"application/pdf"}
+
+# Canonical metric names keyed by normalized line item labels
+METRIC_ALIASES = {
+    "total_revenue": "total_revenue",
+    "revenue": "total_revenue",
+    "total_net_revenue": "total_revenue",
+    "net_revenue": "total_revenue",
+    "total_revenues": "total_revenue",
+    "net_interest_income": "net_interest_income",
+    "nii": "net_interest_income",
+    "noninterest_income": "noninterest_income",
+    "non_interest_income": "noninterest_income",
+    "noninterest_expense": "noninterest_expense",
+    "non_interest_expense": "noninterest_expense",
+    "total_noninterest_expense": "noninterest_expense",
+    "operating_expenses": "noninterest_expense",
+    "provision_for_credit_losses": "provision_for_credit_losses",
+    "net_income": "net_income",
+    "earning_assets": "earning_assets",
+    "average_earning_assets": "earning_assets",
+    "interest_earning_assets": "earning_assets",
+    "total_assets": "total_assets",
+    "total_liabilities": "total_liabilities",
+    "total_equity": "total_equity",
+    "shareholders_equity": "total_equity",
+    "total_loans": "total_loans",
+    "loans": "total_loans",
+    "net_loans": "total_loans",
+    "total_deposits": "total_deposits",
+    "deposits": "total_deposits",
+    "nonperforming_loans": "nonperforming_loans",
+    "non_performing_loans": "nonperforming_loans",
+    "npl": "nonperforming_loans",
+    "high_quality_liquid_assets": "hqla",
+    "hqla": "hqla",
+    "net_cash_outflows": "net_cash_outflows",
+    "total_net_cash_outflows": "net_cash_outflows",
+    "cet1_capital": "cet1_capital",
+    "risk_weighted_assets": "risk_weighted_assets",
+    "operating_cash_flow": "operating_cash_flow",
+    "net_cash_from_operating_activities": "operating_cash_flow",
+    "investing_cash_flow": "investing_cash_flow",
+    "net_cash_used_in_investing_activities": "investing_cash_flow",
+    "financing_cash_flow": "financing_cash_flow",
+    "net_cash_used_in_financing_activities": "financing_cash_flow",
+    "customers": "customers",
+    "customer_count": "customers",
+}
+
+# Statement each canonical metric belongs to, used when a table doesn't say
+METRIC_STATEMENTS = {
+    "total_revenue": "income_statement",
+    "net_interest_income": "income_statement",
+    "noninterest_income": "income_statement",
+    "noninterest_expense": "income_statement",
+    "provision_for_credit_losses": "income_statement",
+    "net_income": "income_statement",
+    "earning_assets": "balance_sheet",
+    "total_assets": "balance_sheet",
+    "total_liabilities": "balance_sheet",
+    "total_equity": "balance_sheet",
+    "total_loans": "balance_sheet",
+    "total_deposits": "balance_sheet",
+    "nonperforming_loans": "balance_sheet",
+    "hqla": "balance_sheet",
+    "net_cash_outflows": "balance_sheet",
+    "cet1_capital": "balance_sheet",
+    "risk_weighted_assets": "balance_sheet",
+    "operating_cash_flow": "cash_flow",
+    "investing_cash_flow": "cash_flow",
+    "financing_cash_flow": "cash_flow",
+    "customers": "kpis",
+}
+
+STATEMENT_KEYWORDS = [
+    ("income_statement", ("income statement", "statement of income", "statement of operations")),
+    ("balance_sheet", ("balance sheet", "financial condition", "financial position")),
+    ("cash_flow", ("cash flow", "cash flows")),
+]
+
+BANK_COLUMNS = ("bank", "competitor", "institution", "company", "entity")
+PERIOD_COLUMNS = ("period", "quarter", "fiscal_period", "date", "year")
+STATEMENT_COLUMNS = ("statement", "report", "section")
+METRIC_COLUMNS = ("metric", "line_item", "item", "account", "description", "label")
+VALUE_COLUMNS = ("value", "amount", "reported_value")
+
+PERIOD_PATTERN = re.compile(r"\b(?:Q[1-4]\s*(?:FY)?\s*'?\d{2,4}|FY\s*'?\d{2,4}|H[12]\s*\d{4}|(?:19|20)\d{2})\b", re.I)
+NUMBER_PATTERN = re.compile(r"\(?-?\$?\d[\d,]*(?:\.\d+)?\)?%?")
+PDF_LINE_PATTERN = re.compile(r"^(?P<label>[A-Za-z][A-Za-z&,'()/\- ]{2,80}?)\s+(?P<numbers>(?:\(?-?\$?\d[\d,]*(?:\.\d+)?\)?%?\s*)+)$")
+
+
+def snake_case(label: Any) -> str:
+    """Normalize a free-text label to snake_case"""
+    text = re.sub(r"[^0-9a-z]+", "_", str(label).strip().lower())
+    return text.strip("_")
+
+
+def normalize_metric(label: Any) -> str:
+    """Map a line item label to its canonical metric name"""
+    key = snake_case(label)
+    return METRIC_ALIASES.get(key, key)
+
+
+def normalize_period(label: Any) -> Optional[str]:
+    """Normalize period labels like 'q4 2024' or 'FY24' to 'Q4 2024' / 'FY 2024'"""
+    if label is None:
+        return None
+    if isinstance(label, float) and label.is_integer():
+        # Year columns with gaps are read as floats
+        label = int(label)
+    text = str(label).strip()
+    match = re.match(r"^Q([1-4])\s*(?:FY)?\s*'?(\d{2,4})$", text, re.I)
+    if match:
+        year = match.group(2)
+        return f"Q{match.group(1)} {'20' + year if len(year) == 2 else year}"
+    match = re.match(r"^FY\s*'?(\d{2,4})$", text, re.I)
+    if match:
+        year = match.group(1)
+        return f"FY {'20' + year if len(year) == 2 else year}"
+    match = re.match(r"^((?:19|20)\d{2})(?:-\d{2}-\d{2}.*)?$", text)
+    if match:
+        return match.group(1)
+    return text or None
+
+
+def parse_number(raw: Any) -> Optional[float]:
+    """Parse reported numbers such as '$1,234.5', '(12.3)' or '4.5%'"""
+    if raw is None:
+        return None
+    if isinstance(raw, (int, float)):
+        return None if raw != raw else float(raw)
+
+    text = str(raw).strip().replace("$", "").replace(",", "").replace("%", "")
+    if not text or text in {"-", "—", "–", "n/a", "N/A", "NM"}:
+        return None
+
+    negative = text.startswith("(") and text.endswith(")")
+    text = text.strip("()")
+    try:
+        value = float(text)
+    except ValueError:
+        return None
+    return -value if negative else value
+
+
+def statement_for(metric: str, default: Optional[str] = None) -> str:
+    """Get the statement a metric is reported on"""
+    return METRIC_STATEMENTS.get(metric) or default or "other"
+
+
+def make_row(bank: str, period: Optional[str], statement: Optional[str], metric: str, value: float) -> Dict[str, Any]:
+    """Build one normalized financial row"""
+    return {
+        "bank": bank,
+        "period": period or "unknown",
+        "statement": statement_for(metric, statement),
+        "metric": metric,
+        "value": value
+    }
+
+
+def find_column(columns: List[str], candidates: tuple) -> Optional[str]:
+    """Find the first column matching one of the candidate names"""
+    return next((column for column in columns if column in candidates), None)
+
+
+def cell(record: Dict[str, Any], column: Optional[str]) -> Any:
+    """Get a table cell, None where the column is absent or the cell is empty or NaN"""
+    value = record.get(column) if column else None
+    if value is None or value != value or (isinstance(value, str) and not value.strip()):
+        return None
+    return value
+
+
+def normalize_table(frame, default_bank: str, default_statement: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Turn a long- or wide-format table into normalized rows"""
+    frame = frame.dropna(how="all").dropna(axis=1, how="all")
+    if frame.empty:
+        return []
+
+    frame = frame.copy()
+    frame.columns = [snake_case(column) for column in frame.columns]
+    columns = list(frame.columns)
+
+    metric_column = find_column(columns, METRIC_COLUMNS)
+    value_column = find_column(columns, VALUE_COLUMNS)
+    rows = []
+
+    # Long format: one row per (bank, period, metric, value)
+    if metric_column and value_column:
+        bank_column = find_column(columns, BANK_COLUMNS)
+        period_column = find_column(columns, PERIOD_COLUMNS)
+        statement_column = find_column(columns, STATEMENT_COLUMNS)
+
+        for record in frame.to_dict("records"):
+            value = parse_number(record.get(value_column))
+            metric = cell(record, metric_column)
+            if value is None or metric is None:
+                continue
+            bank = cell(record, bank_column)
+            statement = cell(record, statement_column)
+            rows.append(make_row(
+                str(bank) if bank is not None else default_bank,
+                normalize_period(cell(record, period_column)),
+                snake_case(statement) if statement is not None else default_statement,
+                normalize_metric(metric),
+                value
+            ))
+        return rows
+
+    # Wide format: a label column followed by one column per period
+    label_column = metric_column or columns[0]
+    period_columns = [column for column in columns if column != label_column and PERIOD_PATTERN.search(column.replace("_", " "))]
+    if not period_columns:
+        period_columns = [column for column in columns if column != label_column]
+
+    for record in frame.to_dict("records"):
+        label = cell(record, label_column)
+        if label is None or parse_number(label) is not None:
+            continue
+        metric = normalize_metric(label)
+        for column in period_columns:
+            value = parse_number(record.get(column))
+            if value is None:
+                continue
+            rows.append(make_row(default_bank, normalize_period(column.replace("_", " ")), default_statement, metric, value))
+
+    return rows
+
+
+def detect_statement(text: str) -> Optional[str]:
+    """Guess which statement a page of text belongs to"""
+    lowered = text.lower()
+    for statement, keywords in STATEMENT_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return statement
+    return None
+
+
+def parse_pdf(file_path: str, default_bank: str) -> Dict[str, Any]:
+    """Pull line items out of a PDF's text layer"""
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(file_path)
+    rows = []
+    tables = 0
+
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        statement = detect_statement(text)
+        periods: List[str] = []
+        page_rows = 0
+
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+
+            # A line made of period labels starts a new column layout
+            header_periods = PERIOD_PATTERN.findall(line)
+            if len(header_periods) >= 2 and not PDF_LINE_PATTERN.match(line):
+                periods = [normalize_period(period) for period in header_periods]
+                continue
+
+            match = PDF_LINE_PATTERN.match(line)
+            if not match:
+                continue
+
+            values = [parse_number(number) for number in NUMBER_PATTERN.findall(match.group("numbers"))]
+            metric = normalize_metric(match.group("label"))
+            for index, value in enumerate(values):
+                if value is None:
+                    continue
+                period = periods[index] if index < len(periods) else None
+                rows.append(make_row(default_bank, period, statement, metric, value))
+                page_rows += 1
+
+        if page_rows:
+            tables += 1
+
+    return {"rows": rows, "tables": tables, "metadata": {"pages": len(reader.pages)}}
+
+
+def parse_spreadsheet(file_path: str, content_type: str, default_bank: str) -> Dict[str, Any]:
+    """Pull line items out of every sheet of a CSV or Excel file"""
+    import pandas as pd
+
+    if content_type in CSV_TYPES:
+        sheets = {"": pd.read_csv(file_path)}
+    else:
+        sheets = pd.read_excel(file_path, sheet_name=None)
+
+    rows = []
+    tables = 0
+    for sheet_name, frame in sheets.items():
+        sheet_rows = normalize_table(frame, default_bank, detect_statement(sheet_name) if sheet_name else None)
+        if sheet_rows:
+            tables += 1
+            rows.extend(sheet_rows)
+
+    return {"rows": rows, "tables": tables, "metadata": {"sheets": len(sheets)}}
+
+
+def extract_document(file_path: str, content_type: str, filename: str, bank: Optional[str] = None) -> Dict[str, Any]:
+    """Extract normalized financial rows from an uploaded document"""
+    default_bank = bank or os.path.splitext(os.path.basename(filename))[0]
+
+    if content_type in PDF_TYPES:
+        result = parse_pdf(file_path, default_bank)
+    elif content_type in CSV_TYPES or content_type in EXCEL_TYPES:
+        result = parse_spreadsheet(file_path, content_type, default_bank)
+    else:
+        raise ValueError(f"Unsupported content type {content_type}")
+
+    result["metadata"].update({
+        "extracted_tables": result["tables"],
+        "key_metrics_found": len({row["metric"] for row in result["rows"] if row["metric"] in METRIC_STATEMENTS}),
+        "rows": len(result["rows"])
+    })
+    return result
@@ -0,0 +1,67 @@
+from loguru import logger
+from typing import List, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import time
+
+from app.core.config import settings
+
+
+def endpoints(uri: str, default_port: int) -> List[Tuple[str, int]]:
+    """Get the host/port pairs of a connection URI, including replica set seeds"""
+    netloc = urlsplit(uri).netloc.rpartition("@")[2]
+    pairs = []
+    for host in netloc.split(","):
+        parsed = urlsplit(f"//{host}")
+        pairs.append((parsed.hostname or "localhost", parsed.port or default_port))
+    return pairs
+
+
+async def reachable(host: str, port: int) -> bool:
+    """Check that a TCP connection opens within the probe budget"""
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port),
+            settings.DEPENDENCY_PROBE_TIMEOUT
+        )
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    return True
+
+
+async def probe(uri: str, default_port: int) -> bool:
+    """Check whether any host of a connection URI accepts connections"""
+    if uri.startswith("mongodb+srv://"):
+        # Hosts come from DNS; leave it to the driver
+        return True
+    results = await asyncio.gather(*(reachable(host, port) for host, port in endpoints(uri, default_port)))
+    return any(results)
+
+
+async def detect_dependencies() -> None:
+    """In development, fall back to mocks for MongoDB/Redis if they can't be reached
+
+    Both are probed at once at their configured addresses, so startup waits
+    at most DEPENDENCY_PROBE_TIMEOUT.
+    """
+    if settings.ENVIRONMENT != "development":
+        return
+
+    started = time.perf_counter()
+    checks = {}
+    if not settings.DISABLE_DATABASE:
+        checks["mongodb"] = probe(settings.MONGODB_URI, 27017)
+    if not settings.DISABLE_REDIS:
+        checks["redis"] = probe(settings.REDIS_URL, 6379)
+    if not checks:
+        return
+
+    results = dict(zip(checks, await asyncio.gather(*checks.values())))
+    if not results.get("mongodb", True):
+        settings.DISABLE_DATABASE = True
+    if not results.get("redis", True):
+        settings.DISABLE_REDIS = True
+
+    summary = ", ".join(f"{name} {'reachable' if ok else 'unreachable'}" for name, ok in results.items())
+    logger.info(f"🔎 Dependency probes took {(time.perf_counter() - started) * 1000:.0f} ms: {summary}")
@@ -0,0 +1,207 @@
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+import asyncio
+import sys
+
+from app.core.config import settings
+from app.core.pagination import facet_pipeline, keyset_sort, ranked_pipeline
+from app.core.search import ANALYSIS_SEARCH, QUESTION_SEARCH, USER_SEARCH, SearchSpec
+
+
+USER_ID = "query-plan-user"
+ANALYSIS_ID = "query-plan-analysis"
+SEARCH = "quarterly revenue"
+
+# Stages that mean a query reads the whole collection or sorts in memory
+FLAGGED_STAGES = {"COLLSCAN", "SORT"}
+
+
+class QueryShape(NamedTuple):
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: List[Tuple[str, int]]
+    # Searches sort their matches in memory, by relevance or not; the index
+    # only has to find the matches
+    rank: Optional[Dict[str, Any]] = None
+    sorts_in_memory: bool = False
+
+
+class PlanCheck(NamedTuple):
+    shape: QueryShape
+    kind: str
+    flagged: List[str]
+    indexes: List[str]
+
+    @property
+    def ok(self) -> bool:
+        return not self.flagged
+
+
+def endpoint_queries() -> List[QueryShape]:
+    """The filter and sort of each list query the endpoints run"""
+    shapes = []
+
+    for field in ("created_at", "updated_at", "name", "status"):
+        shapes.append(QueryShape(f"analyses by {field}", "analyses", {"user_id": USER_ID}, [(field, -1)]))
+    shapes.append(QueryShape(
+        "analyses with status", "analyses",
+        {"user_id": USER_ID, "status": "completed"}, [("created_at", -1)]
+    ))
+
+    for field in ("created_at", "status", "analysis_id", "user_id"):
+        shapes.append(QueryShape(f"questions by {field}", "market_questions", {"user_id": USER_ID}, [(field, -1)]))
+    shapes.extend([
+        QueryShape(
+            "questions with status", "market_questions",
+            {"user_id": USER_ID, "status": "pending"}, [("created_at", -1)]
+        ),
+        QueryShape(
+            "questions of analysis", "market_questions",
+            {"user_id": USER_ID, "analysis_id": ANALYSIS_ID}, [("created_at", -1)]
+        ),
+        QueryShape(
+            "questions of analysis with status", "market_questions",
+            {"user_id": USER_ID, "analysis_id": ANALYSIS_ID, "status": "pending"}, [("created_at", -1)]
+        ),
+    ])
+
+    files_query = {"user_id": USER_ID, "status": {"$nin": ["uploading", "assembling"]}}
+    shapes.extend([
+        QueryShape("files", "files", files_query, [("upload_date", -1)]),
+        QueryShape("files of analysis", "files", {**files_query, "analysis_id": ANALYSIS_ID}, [("upload_date", -1)]),
+        QueryShape("users", "users", {}, [("created_at", -1)]),
+        QueryShape("users with role", "users", {"role": "analyst"}, [("created_at", -1)]),
+        # is_active is left to the FETCH after the created_at or role index
+        QueryShape("active users", "users", {"is_active": True}, [("created_at", -1)]),
+        QueryShape("active users with role", "users", {"role": "analyst", "is_active": True}, [("created_at", -1)]),
+    ])
+
+    shapes.extend([
+        search_query("analyses search", ANALYSIS_SEARCH, {"user_id": USER_ID}),
+        search_query("analyses search by created_at", ANALYSIS_SEARCH, {"user_id": USER_ID}, "created_at"),
+        search_query("analyses search with status", ANALYSIS_SEARCH, {"user_id": USER_ID, "status": "completed"}),
+        search_query("questions search", QUESTION_SEARCH, {"user_id": USER_ID}),
+        search_query("questions search by created_at", QUESTION_SEARCH, {"user_id": USER_ID}, "created_at"),
+        search_query("users search", USER_SEARCH, {}),
+        search_query("users search with role", USER_SEARCH, {"role": "analyst"}),
+    ])
+    return shapes
+
+
+def search_query(name: str, spec: SearchSpec, query: Dict[str, Any], sort_by: str = "relevance") -> QueryShape:
+    """The shape of a search, ranked by relevance unless sort_by is given"""
+    query = dict(query)
+    spec.narrow(query, SEARCH)
+    rank = spec.rank(SEARCH) if sort_by == "relevance" else None
+    return QueryShape(name, spec.collection, query, [(sort_by, -1)], rank, sorts_in_memory=True)
+
+
+def plan_stages(plan: Any) -> Iterator[Dict[str, Any]]:
+    """Walk every stage of an explain plan, whatever its nesting"""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from plan_stages(item)
+
+
+def winning_plans(explain: Any) -> Iterator[Dict[str, Any]]:
+    """Find the winning plan of every query an explain covers
+
+    A find() has one at the top; an aggregation has one per $cursor stage,
+    or at the top when the whole pipeline ran in the query engine.
+    """
+    if isinstance(explain, dict):
+        planner = explain.get("queryPlanner")
+        if isinstance(planner, dict) and "winningPlan" in planner:
+            yield planner["winningPlan"]
+            return
+        for value in explain.values():
+            yield from winning_plans(value)
+    elif isinstance(explain, list):
+        for item in explain:
+            yield from winning_plans(item)
+
+
+def check_plan(shape: QueryShape, kind: str, explain: Dict[str, Any]) -> PlanCheck:
+    plans = list(winning_plans(explain)) or [explain]
+    stages = [stage for plan in plans for stage in plan_stages(plan)]
+    flagged = {stage["stage"] for stage in stages if stage["stage"] in FLAGGED_STAGES}
+    # A $sort the query planner could not take over runs as its own pipeline stage
+    if any("$sort" in stage for stage in explain.get("stages", [])):
+        flagged.add("$sort")
+    if shape.sorts_in_memory:
+        flagged -= {"SORT", "$sort"}
+    indexes = [stage["indexName"] for stage in stages if "indexName" in stage]
+    return PlanCheck(shape, kind, sorted(flagged), indexes)
+
+
+async def explain_aggregate(database, collection: str, pipeline: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return await database.command(
+        "explain",
+        {"aggregate": collection, "pipeline": pipeline, "cursor": {}},
+        verbosity="queryPlanner"
+    )
+
+
+async def check_queries(database, size: int = 10) -> List[PlanCheck]:
+    """Explain each endpoint query as paginate() runs it
+
+    The first page runs the $facet aggregation that also counts the
+    matches. Cursor pages run a find(), or for ranked searches the
+    aggregation without the count.
+    """
+    checks = []
+    for shape in endpoint_queries():
+        sort_spec = keyset_sort(shape.sort)
+
+        pipeline = facet_pipeline(shape.filter, sort_spec, 0, size, rank=shape.rank)
+        checks.append(check_plan(shape, "page", await explain_aggregate(database, shape.collection, pipeline)))
+
+        if shape.rank:
+            pipeline = ranked_pipeline(shape.filter, shape.rank, sort_spec, size)
+            explain = await explain_aggregate(database, shape.collection, pipeline)
+        else:
+            cursor = database[shape.collection].find(shape.filter).sort(list(sort_spec.items())).limit(size + 1)
+            explain = await cursor.explain()
+        checks.append(check_plan(shape, "cursor", explain))
+    return checks
+
+
+def report(checks: List[PlanCheck]) -> str:
+    lines = []
+    for check in checks:
+        detail = ", ".join(check.flagged) if check.flagged else ", ".join(check.indexes)
+        lines.append(f"{'OK' if check.ok else 'FAIL':<5} {check.shape.collection:<17} {check.shape.name:<36} {check.kind:<7} {detail}")
+    failed = sum(not check.ok for check in checks)
+    lines.append(f"{len(checks) - failed}/{len(checks)} query plans use an index for the filter and, outside searches, the sort")
+    return "\n".join(lines)
+
+
+async def main() -> Optional[int]:
+    """Connect to MONGODB_URI, make sure INDEX_PLAN exists and check every endpoint query"""
+    from app.core.database import close_mongo_connection, connect_to_mongo, db
+
+    if settings.DISABLE_DATABASE:
+        print("DISABLE_DATABASE is set; set it to false to check query plans against MongoDB")
+        return 2
+
+    await connect_to_mongo()
+    if settings.DISABLE_DATABASE:
+        print(f"Could not connect to {settings.MONGODB_URI}")
+        return 2
+
+    try:
+        checks = await check_queries(db.database)
+    finally:
+        await close_mongo_connection()
+
+    print(report(checks))
+    return 0 if all(check.ok for check in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
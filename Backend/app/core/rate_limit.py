@@ -0,0 +1,27 @@
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+
+from app.core.config import settings
+
+
+def storage_uri() -> str:
+    """Share one bucket store between workers through Redis, or keep it local"""
+    return "memory://" if settings.DISABLE_REDIS else settings.REDIS_URL
+
+
+# Every route gets the global default; auth routes add their own tighter limits.
+# The Redis moving window is updated by a Lua script, so concurrent workers
+# can't both take the last slot. If Redis goes away, counting continues in
+# process memory until it comes back.
+limiter = Limiter(
+    key_func=get_remote_address,
+    default_limits=[
+        f"{settings.RATE_LIMIT_PER_MINUTE}/minute",
+        f"{settings.RATE_LIMIT_BURST}/second"
+    ],
+    strategy="moving-window",
+    storage_uri=storage_uri(),
+    storage_options={"password": settings.REDIS_PASSWORD} if settings.REDIS_PASSWORD and not settings.DISABLE_REDIS else {},
+    in_memory_fallback_enabled=True,
+    key_prefix="rate-limit"
+)
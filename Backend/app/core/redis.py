@@ -1,215 +1,511 @@
-import redis.asyncio as redis
-from loguru import logger
-from typing import Optional, Any
-import json
-import pickle
-from datetime import timedelta
-
-from app.core.config import settings
-
-
-class RedisManager:
-    def __init__(self):
-        self.redis_client: Optional[redis.Redis] = None
-    
-    async def connect(self):
-        """Connect to Redis"""
-        if settings.DISABLE_REDIS:
-            logger.warning("🔄 Redis disabled in development mode")
-            return
-            
-        try:
-            logger.info("🔄 Connecting to Redis...")
-            
-            self.redis_client = redis.from_url(
-                settings.REDIS_URL,
-                encoding="utf-8",
-                decode_responses=True,
-                password=settings.REDIS_PASSWORD
-            )
-            
-            # Test connection
-            await self.redis_client.ping()
-            logger.info("✅ Connected to Redis successfully")
-            
-        except Exception as e:
-            logger.error(f"❌ Failed to connect to Redis: {e}")
-            if settings.ENVIRONMENT == "development":
-                logger.warning("🔄 Running in development mode without Redis")
-                settings.DISABLE_REDIS = True
-                return
-            raise
-    
-    async def disconnect(self):
-        """Disconnect from Redis"""
-        if settings.DISABLE_REDIS or not self.redis_client:
-            return
-            
-        try:
-            if self.redis_client:
-                await self.redis_client.close()
-                logger.info("✅ Redis connection closed")
-        except Exception as e:
-            logger.error(f"❌ Error closing Redis connection: {e}")
-    
-    async def get(self, key: str) -> Optional[Any]:
-        """Get value by key"""
-        if settings.DISABLE_REDIS:
-            return None
-            
-        try:
-            if not self.redis_client:
-                return None
-            
-            value = await self.redis_client.get(key)
-            if value:
-                try:
-                    return json.loads(value)
-                except json.JSONDecodeError:
-                    return value
-            return None
-        except Exception as e:
-            logger.error(f"❌ Redis GET error for key {key}: {e}")
-            return None
-    
-    async def set(
-        self, 
-        key: str, 
-        value: Any, 
-        expire: Optional[int] = None
-    ) -> bool:
-        """Set key-value pair with optional expiration"""
-        if settings.DISABLE_REDIS:
-            return True  # Return True to avoid breaking the app
-            
-        try:
-            if not self.redis_client:
-                return False
-            
-            if isinstance(value, (dict, list)):
-                value = json.dumps(value)
-            
-            if expire:
-                await self.redis_client.setex(key, expire, value)
-            else:
-                await self.redis_client.set(key, value)
-            
-            return True
-        except Exception as e:
-            logger.error(f"❌ Redis SET error for key {key}: {e}")
-            return False
-    
-    async def delete(self, key: str) -> bool:
-        """Delete key"""
-        if settings.DISABLE_REDIS:
-            return True
-            
-        try:
-            if not self.redis_client:
-                return False
-            
-            result = await self.redis_client.delete(key)
-            return bool(result)
-        except Exception as e:
-            logger.error(f"❌ Redis DELETE error for key {key}: {e}")
-            return False
-    
-    async def exists(self, key: str) -> bool:
-        """Check if key exists"""
-        if settings.DISABLE_REDIS:
-            return False
-            
-        try:
-            if not self.redis_client:
-                return False
-            
-            result = await self.redis_client.exists(key)
-            return bool(result)
-        except Exception as e:
-            logger.error(f"❌ Redis EXISTS error for key {key}: {e}")
-            return False
-    
-    async def increment(self, key: str, amount: int = 1) -> Optional[int]:
-        """Increment counter"""
-        if settings.DISABLE_REDIS:
-            return amount
-            
-        try:
-            if not self.redis_client:
-                return None
-            
-            result = await self.redis_client.incrby(key, amount)
-            return result
-        except Exception as e:
-            logger.error(f"❌ Redis INCREMENT error for key {key}: {e}")
-            return None
-    
-    async def expire(self, key: str, seconds: int) -> bool:
-        """Set expiration for key"""
-        if settings.DISABLE_REDIS:
-            return True
-            
-        try:
-            if not self.redis_client:
-                return False
-            
-            result = await self.redis_client.expire(key, seconds)
-            return bool(result)
-        except Exception as e:
-            logger.error(f"❌ Redis EXPIRE error for key {key}: {e}")
-            return False
-    
-    async def flush_all(self) -> bool:
-        """Clear all data (use with caution!)"""
-        if settings.DISABLE_REDIS:
-            return True
-            
-        try:
-            if not self.redis_client:
-                return False
-            
-            await self.redis_client.flushall()
-            return True
-        except Exception as e:
-            logger.error(f"❌ Redis FLUSHALL error: {e}")
-            return False
-
-
-# Global Redis manager instance
-redis_manager = RedisManager()
-
-
-async def connect_to_redis():
-    """Connect to Redis"""
-    await redis_manager.connect()
-
-
-async def close_redis_connection():
-    """Close Redis connection"""
-    await redis_manager.disconnect()
-
-
-def get_redis_client():
-    """Get Redis client instance"""
-    return redis_manager
-
-
-# Convenience functions
-async def cache_get(key: str) -> Optional[Any]:
-    """Get cached value"""
-    return await redis_manager.get(key)
-
-
-async def cache_set(key: str, value: Any, expire: int = settings.CACHE_TTL) -> bool:
-    """Set cached value"""
-    return await redis_manager.set(key, value, expire)
-
-
-async def cache_delete(key: str) -> bool:
-    """Delete cached value"""
-    return await redis_manager.delete(key)
-
-
-async def cache_key_exists(key: str) -> bool:
-    """Check if cache key exists"""
+import redis.asyncio as redis
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError as RedisConnectionError
+from loguru import logger
+from typing import Optional, Any, Awaitable, Callable, Dict, List
+import asyncio
+import json
+import pickle
+import time
+from datetime import timedelta
+
+from app.core.config import settings
+from app.core.metrics import (
+    REDIS_ERRORS,
+    REDIS_POOL_IDLE,
+    REDIS_POOL_IN_USE,
+    REDIS_POOL_WAITS,
+    REDIS_POOL_WAIT_SECONDS
+)
+
+
+# Seconds a pub/sub listener waits for a message before polling again
+PUBSUB_POLL_INTERVAL = 1.0
+# Backoff between attempts to resubscribe a lost pub/sub listener
+PUBSUB_RETRY_DELAY = 0.5
+PUBSUB_MAX_RETRY_DELAY = 30.0
+
+
+class RedisUnavailable(Exception):
+    """A Redis command failed where carrying on without it would be unsafe"""
+
+
+class InstrumentedConnectionPool(redis.BlockingConnectionPool):
+    """Bounded pool that counts the commands which had to wait for a connection"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waits = 0
+    
+    async def get_connection(self, command_name, *keys, **options):
+        if self.can_get_connection():
+            return await self.checkout()
+        
+        self.waits += 1
+        REDIS_POOL_WAITS.inc()
+        started = time.perf_counter()
+        try:
+            return await self.checkout()
+        finally:
+            REDIS_POOL_WAIT_SECONDS.observe(time.perf_counter() - started)
+    
+    async def checkout(self):
+        """Take a connection, waiting up to the pool timeout, and connect it outside the pool lock
+        
+        BlockingConnectionPool connects while holding its lock and, when that
+        fails, releases the connection back under the same lock, which never
+        returns. Every later command would then hang while Redis is down.
+        """
+        try:
+            async with asyncio.timeout(self.timeout):
+                async with self._condition:
+                    await self._condition.wait_for(self.can_get_connection)
+                    try:
+                        connection = self._available_connections.pop()
+                    except IndexError:
+                        connection = self.make_connection()
+                    self._in_use_connections.add(connection)
+        except asyncio.TimeoutError as err:
+            raise RedisConnectionError("No connection available.") from err
+        
+        try:
+            await self.ensure_connection(connection)
+        except BaseException:
+            await self.release(connection)
+            raise
+        return connection
+
+
+class RedisManager:
+    def __init__(self):
+        self.redis_client: Optional[redis.Redis] = None
+        self.pool: Optional[InstrumentedConnectionPool] = None
+        self.errors = 0
+    
+    async def connect(self):
+        """Connect to Redis"""
+        if settings.DISABLE_REDIS:
+            logger.warning("🔄 Redis disabled in development mode")
+            return
+            
+        try:
+            logger.info("🔄 Connecting to Redis...")
+            
+            self.pool = InstrumentedConnectionPool.from_url(
+                settings.REDIS_URL,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                timeout=settings.REDIS_POOL_TIMEOUT,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+                health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+                retry=Retry(
+                    ExponentialBackoff(cap=settings.REDIS_RETRY_BACKOFF_CAP, base=settings.REDIS_RETRY_BACKOFF_BASE),
+                    settings.REDIS_RETRY_ATTEMPTS
+                ),
+                retry_on_error=[RedisConnectionError],
+                encoding="utf-8",
+                decode_responses=True,
+                password=settings.REDIS_PASSWORD
+            )
+            self.redis_client = redis.Redis.from_pool(self.pool)
+            
+            # Test connection
+            await self.redis_client.ping()
+            logger.info("✅ Connected to Redis successfully")
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to connect to Redis: {e}")
+            if settings.ENVIRONMENT == "development":
+                logger.warning("🔄 Running in development mode without Redis")
+                settings.DISABLE_REDIS = True
+                return
+            raise
+    
+    async def disconnect(self):
+        """Disconnect from Redis"""
+        if settings.DISABLE_REDIS or not self.redis_client:
+            return
+            
+        try:
+            if self.redis_client:
+                await self.redis_client.close()
+                logger.info("✅ Redis connection closed")
+        except Exception as e:
+            logger.error(f"❌ Error closing Redis connection: {e}")
+    
+    def record_error(self, command: str) -> None:
+        """Count a failed command, so degradation shows in /health and metrics"""
+        self.errors += 1
+        REDIS_ERRORS.labels(command).inc()
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool usage and error counts"""
+        if settings.DISABLE_REDIS or self.pool is None:
+            return {}
+        return {
+            "max_connections": self.pool.max_connections,
+            "in_use": len(self.pool._in_use_connections),
+            "idle": len(self.pool._available_connections),
+            "waits": self.pool.waits,
+            "errors": self.errors
+        }
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """Get value by key"""
+        if settings.DISABLE_REDIS:
+            return None
+            
+        try:
+            if not self.redis_client:
+                return None
+            
+            value = await self.redis_client.get(key)
+            if value:
+                try:
+                    return json.loads(value)
+                except json.JSONDecodeError:
+                    return value
+            return None
+        except Exception as e:
+            logger.error(f"❌ Redis GET error for key {key}: {e}")
+            self.record_error("GET")
+            return None
+    
+    async def set(
+        self, 
+        key: str, 
+        value: Any, 
+        expire: Optional[int] = None
+    ) -> bool:
+        """Set key-value pair with optional expiration"""
+        if settings.DISABLE_REDIS:
+            return True  # Return True to avoid breaking the app
+            
+        try:
+            if not self.redis_client:
+                return False
+            
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value)
+            
+            if expire:
+                await self.redis_client.setex(key, expire, value)
+            else:
+                await self.redis_client.set(key, value)
+            
+            return True
+        except Exception as e:
+            logger.error(f"❌ Redis SET error for key {key}: {e}")
+            self.record_error("SET")
+            return False
+    
+    async def delete(self, key: str) -> bool:
+        """Delete key"""
+        if settings.DISABLE_REDIS:
+            return True
+            
+        try:
+            if not self.redis_client:
+                return False
+            
+            result = await self.redis_client.delete(key)
+            return bool(result)
+        except Exception as e:
+            logger.error(f"❌ Redis DELETE error for key {key}: {e}")
+            self.record_error("DELETE")
+            return False
+    
+    async def exists(self, key: str) -> bool:
+        """Check if key exists"""
+        if settings.DISABLE_REDIS:
+            return False
+            
+        try:
+            if not self.redis_client:
+                return False
+            
+            result = await self.redis_client.exists(key)
+            return bool(result)
+        except Exception as e:
+            logger.error(f"❌ Redis EXISTS error for key {key}: {e}")
+            self.record_error("EXISTS")
+            return False
+    
+    async def increment(self, key: str, amount: int = 1) -> Optional[int]:
+        """Increment counter"""
+        if settings.DISABLE_REDIS:
+            return amount
+            
+        try:
+            if not self.redis_client:
+                return None
+            
+            result = await self.redis_client.incrby(key, amount)
+            return result
+        except Exception as e:
+            logger.error(f"❌ Redis INCREMENT error for key {key}: {e}")
+            self.record_error("INCREMENT")
+            return None
+    
+    async def expire(self, key: str, seconds: int) -> bool:
+        """Set expiration for key"""
+        if settings.DISABLE_REDIS:
+            return True
+            
+        try:
+            if not self.redis_client:
+                return False
+            
+            result = await self.redis_client.expire(key, seconds)
+            return bool(result)
+        except Exception as e:
+            logger.error(f"❌ Redis EXPIRE error for key {key}: {e}")
+            self.record_error("EXPIRE")
+            return False
+    
+    async def publish(self, channel: str, message: str, strict: bool = False) -> bool:
+        """Publish a message to a pub/sub channel; with strict, failures raise RedisUnavailable"""
+        if settings.DISABLE_REDIS:
+            return True
+            
+        try:
+            if not self.redis_client:
+                raise ConnectionError("Redis is not connected")
+            
+            await self.redis_client.publish(channel, message)
+            return True
+        except Exception as e:
+            logger.error(f"❌ Redis PUBLISH error for channel {channel}: {e}")
+            self.record_error("PUBLISH")
+            if strict:
+                raise RedisUnavailable(f"PUBLISH {channel}: {e}") from e
+            return False
+    
+    async def listen(
+        self,
+        channel: str,
+        handler: Callable[[str], Any],
+        on_subscribe: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> None:
+        """Call handler with every message published to a channel until cancelled
+        
+        The pool's socket_timeout is meant for commands; a blocking read on a
+        quiet channel would trip it. Instead this polls with its own read
+        timeout, which returns nothing when idle, while the pool's health
+        checks still catch a dead connection. Connection errors are raised.
+        on_subscribe runs once the subscription is in place, before any
+        message is handled.
+        """
+        if settings.DISABLE_REDIS or not self.redis_client:
+            return
+        
+        pubsub = self.redis_client.pubsub()
+        try:
+            await pubsub.subscribe(channel)
+            if on_subscribe is not None:
+                await on_subscribe()
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=PUBSUB_POLL_INTERVAL)
+                if message is not None and message.get("type") == "message":
+                    handler(message["data"])
+        finally:
+            await pubsub.aclose()
+    
+    async def follow(
+        self,
+        channel: str,
+        handler: Callable[[str], Any],
+        on_subscribe: Optional[Callable[[], Awaitable[Any]]] = None,
+        on_lost: Optional[Callable[[], Any]] = None
+    ) -> None:
+        """Listen to a channel until cancelled, resubscribing with backoff when the subscription is lost
+        
+        on_lost runs as soon as a subscription fails, so callers can stop
+        relying on broadcasts they may be missing; on_subscribe runs after
+        every successful (re)subscription.
+        """
+        delay = PUBSUB_RETRY_DELAY
+        while not settings.DISABLE_REDIS and self.redis_client:
+            subscribed = False
+            
+            async def resubscribed():
+                nonlocal subscribed
+                if on_subscribe is not None:
+                    await on_subscribe()
+                subscribed = True
+            
+            try:
+                await self.listen(channel, handler, resubscribed)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.record_error("SUBSCRIBE")
+                if subscribed:
+                    delay = PUBSUB_RETRY_DELAY
+                logger.error(f"❌ Redis subscription to {channel} lost: {e}; retrying in {delay:.1f}s")
+            if on_lost is not None:
+                on_lost()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, PUBSUB_MAX_RETRY_DELAY)
+    
+    async def hset(self, name: str, key: str, value: Any, strict: bool = False) -> bool:
+        """Set a field of a hash; with strict, failures raise RedisUnavailable"""
+        if settings.DISABLE_REDIS:
+            return True
+            
+        try:
+            if not self.redis_client:
+                raise ConnectionError("Redis is not connected")
+            
+            await self.redis_client.hset(name, key, value)
+            return True
+        except Exception as e:
+            logger.error(f"❌ Redis HSET error for key {name}: {e}")
+            self.record_error("HSET")
+            if strict:
+                raise RedisUnavailable(f"HSET {name}: {e}") from e
+            return False
+    
+    async def hsetnx(self, name: str, key: str, value: Any, strict: bool = False) -> bool:
+        """Set a field of a hash unless it exists; returns whether it was set"""
+        if settings.DISABLE_REDIS:
+            return True
+            
+        try:
+            if not self.redis_client:
+                raise ConnectionError("Redis is not connected")
+            
+            return bool(await self.redis_client.hsetnx(name, key, value))
+        except Exception as e:
+            logger.error(f"❌ Redis HSETNX error for key {name}: {e}")
+            self.record_error("HSETNX")
+            if strict:
+                raise RedisUnavailable(f"HSETNX {name}: {e}") from e
+            return False
+    
+    async def hget(self, name: str, key: str, strict: bool = False) -> Optional[str]:
+        """Get a field of a hash; with strict, failures raise RedisUnavailable"""
+        if settings.DISABLE_REDIS:
+            return None
+            
+        try:
+            if not self.redis_client:
+                raise ConnectionError("Redis is not connected")
+            
+            return await self.redis_client.hget(name, key)
+        except Exception as e:
+            logger.error(f"❌ Redis HGET error for key {name}: {e}")
+            self.record_error("HGET")
+            if strict:
+                raise RedisUnavailable(f"HGET {name}: {e}") from e
+            return None
+    
+    async def hgetall(self, name: str, strict: bool = False) -> Dict[str, str]:
+        """Get all fields of a hash; with strict, failures raise RedisUnavailable"""
+        if settings.DISABLE_REDIS:
+            return {}
+            
+        try:
+            if not self.redis_client:
+                raise ConnectionError("Redis is not connected")
+            
+            return await self.redis_client.hgetall(name)
+        except Exception as e:
+            logger.error(f"❌ Redis HGETALL error for key {name}: {e}")
+            self.record_error("HGETALL")
+            if strict:
+                raise RedisUnavailable(f"HGETALL {name}: {e}") from e
+            return {}
+    
+    async def hdel(self, name: str, *keys: str) -> bool:
+        """Delete fields of a hash"""
+        if settings.DISABLE_REDIS or not keys:
+            return True
+            
+        try:
+            if not self.redis_client:
+                return False
+            
+            await self.redis_client.hdel(name, *keys)
+            return True
+        except Exception as e:
+            logger.error(f"❌ Redis HDEL error for key {name}: {e}")
+            self.record_error("HDEL")
+            return False
+    
+    async def eval(self, script: str, keys: List[str], args: List[Any], strict: bool = False) -> Any:
+        """Run a Lua script atomically; with strict, failures raise RedisUnavailable"""
+        if settings.DISABLE_REDIS:
+            return None
+            
+        try:
+            if not self.redis_client:
+                raise ConnectionError("Redis is not connected")
+            
+            return await self.redis_client.eval(script, len(keys), *keys, *args)
+        except Exception as e:
+            logger.error(f"❌ Redis EVAL error for keys {keys}: {e}")
+            self.record_error("EVAL")
+            if strict:
+                raise RedisUnavailable(f"EVAL {keys}: {e}") from e
+            return None
+    
+    async def flush_all(self) -> bool:
+        """Clear all data (use with caution!)"""
+        if settings.DISABLE_REDIS:
+            return True
+            
+        try:
+            if not self.redis_client:
+                return False
+            
+            await self.redis_client.flushall()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Redis FLUSHALL error: {e}")
+            self.record_error("FLUSHALL")
+            return False
+
+
+# Global Redis manager instance
+redis_manager = RedisManager()
+
+REDIS_POOL_IN_USE.set_function(lambda: redis_manager.pool_stats().get("in_use", 0))
+REDIS_POOL_IDLE.set_function(lambda: redis_manager.pool_stats().get("idle", 0))
+
+
+async def connect_to_redis():
+    """Connect to Redis"""
+    await redis_manager.connect()
+
+
+async def close_redis_connection():
+    """Close Redis connection"""
+    await redis_manager.disconnect()
+
+
+def get_redis_client():
+    """Get Redis client instance"""
+    return redis_manager
+
+
+# Convenience functions
+async def cache_get(key: str) -> Optional[Any]:
+    """Get cached value"""
+    return await redis_manager.get(key)
+
+
+async def cache_set(key: str, value: Any, expire: int = settings.CACHE_TTL) -> bool:
+    """Set cached value"""
+    return await redis_manager.set(key, value, expire)
+
+
+async def cache_delete(key: str) -> bool:
+    """Delete cached value"""
+    return await redis_manager.delete(key)
+
+
+async def cache_key_exists(key: str) -> bool:
+    """Check if cache key exists"""
     return await redis_manager.exists(key) 
\ No newline at end of file
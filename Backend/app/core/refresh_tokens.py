@@ -0,0 +1,136 @@
+from loguru import logger
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import time
+
+from app.core.config import settings
+from app.core.redis import redis_manager
+
+
+# KEYS: token, family. ARGV: record, ttl
+ISSUE_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('SET', KEYS[2], KEYS[1], 'EX', ARGV[2])
+return 1
+"""
+
+# KEYS: old token, family, new token. ARGV: new record, ttl
+ROTATE_SCRIPT = """
+local record = redis.call('GETDEL', KEYS[1])
+if not record then
+    local current = redis.call('GET', KEYS[2])
+    if current then
+        redis.call('DEL', KEYS[2], current)
+    end
+    return false
+end
+redis.call('SET', KEYS[3], ARGV[1], 'EX', ARGV[2])
+redis.call('SET', KEYS[2], KEYS[3], 'EX', ARGV[2])
+return record
+"""
+
+# KEYS: family
+REVOKE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current then
+    redis.call('DEL', KEYS[1], current)
+end
+return current
+"""
+
+
+def token_key(jti: str) -> str:
+    return f"refresh:{hashlib.sha256(jti.encode()).hexdigest()}"
+
+
+def family_key(family: str) -> str:
+    return f"refresh_family:{family}"
+
+
+class RefreshTokenStore:
+    """Live refresh tokens, one per login family, rotated on every refresh
+
+    Each token id maps (hashed) to its user, family and expiry, and each
+    family points at its one current token; both expire through Redis TTLs.
+    Refreshing consumes the presented token and stores its successor in one
+    Lua call. Presenting a token that was already consumed means it leaked,
+    so the whole family is revoked. Redis errors raise RedisUnavailable
+    rather than passing for reuse or for a stored token. Without Redis the
+    same state is kept in process memory.
+    """
+
+    def __init__(self):
+        self.local: Dict[str, Tuple[Any, float]] = {}
+
+    @staticmethod
+    def record(payload: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+        """Build the stored record for a refresh token and its TTL"""
+        record = {"user_id": payload["sub"], "family": payload["fam"], "exp": payload["exp"]}
+        return record, max(int(payload["exp"] - time.time()), 1)
+
+    async def add(self, payload: Dict[str, Any]) -> None:
+        """Store the first refresh token of a new family"""
+        record, ttl = self.record(payload)
+        keys = [token_key(payload["jti"]), family_key(payload["fam"])]
+
+        if settings.DISABLE_REDIS:
+            self.prune()
+            self.local_set(keys[0], record, ttl)
+            self.local_set(keys[1], keys[0], ttl)
+            return
+
+        await redis_manager.eval(ISSUE_SCRIPT, keys, [json.dumps(record), ttl], strict=True)
+
+    async def rotate(self, payload: Dict[str, Any], successor: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Consume a refresh token and store its successor
+
+        Returns the consumed record, or None when the token was not current,
+        in which case its family has been revoked. Raises RedisUnavailable
+        if Redis could not be asked.
+        """
+        record, ttl = self.record(successor)
+        keys = [token_key(payload["jti"]), family_key(payload["fam"]), token_key(successor["jti"])]
+
+        if settings.DISABLE_REDIS:
+            current = self.local.pop(keys[0], None)
+            if current is None or current[1] <= time.time():
+                self.local_revoke(keys[1])
+                stored = None
+            else:
+                stored = current[0]
+                self.local_set(keys[2], record, ttl)
+                self.local_set(keys[1], keys[2], ttl)
+        else:
+            stored = await redis_manager.eval(ROTATE_SCRIPT, keys, [json.dumps(record), ttl], strict=True)
+            stored = json.loads(stored) if stored else None
+
+        if stored is None:
+            logger.warning(f"⚠️ Refresh token reuse for user {payload['sub']}, revoked family {payload['fam']}")
+            return None
+        return stored
+
+    async def revoke_family(self, family: str) -> None:
+        """End a login family, invalidating its current refresh token"""
+        if settings.DISABLE_REDIS:
+            self.local_revoke(family_key(family))
+            return
+        await redis_manager.eval(REVOKE_SCRIPT, [family_key(family)], [], strict=True)
+
+    def local_set(self, key: str, value: Any, ttl: int) -> None:
+        self.local[key] = (value, time.time() + ttl)
+
+    def local_revoke(self, family: str) -> None:
+        current = self.local.pop(family, None)
+        if current is not None:
+            self.local.pop(current[0], None)
+
+    def prune(self) -> None:
+        """Forget local entries past their expiry"""
+        now = time.time()
+        for key in [key for key, (_, expires_at) in self.local.items() if expires_at <= now]:
+            del self.local[key]
+
+
+# Global refresh token store instance
+refresh_token_store = RefreshTokenStore()
@@ -0,0 +1,206 @@
+from collections import defaultdict
+from pymongo import UpdateOne
+from typing import Any, Dict, Iterable, List, Optional, Set
+import asyncio
+import re
+import sys
+import unicodedata
+
+from app.core.config import settings
+
+
+WORD = re.compile(r"[^\W_]+")  # letters and digits; underscores split words
+
+
+def tokenize(text: Any) -> List[str]:
+    """Split text into lowercase words, with accents removed"""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    folded = "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+    return WORD.findall(folded)
+
+
+def query_terms(text: Optional[str]) -> List[str]:
+    """Get the words of a search query that are matched, in order
+
+    Queries are tokenized like the documents and matched by equality, so
+    user input never reaches a regex and needs no escaping.
+    """
+    terms = []
+    for word in tokenize(text or ""):
+        if len(word) >= settings.SEARCH_MIN_PREFIX and word not in terms:
+            terms.append(word)
+    return terms[:settings.SEARCH_MAX_TERMS]
+
+
+def searching(text: Optional[str]) -> bool:
+    """Check whether a search query has any words to match"""
+    return bool(query_terms(text))
+
+
+def search_sort(sort_by: Optional[str], ranked: bool) -> str:
+    """Default to relevance while searching and created_at otherwise"""
+    if sort_by is None:
+        return "relevance" if ranked else "created_at"
+    if sort_by == "relevance" and not ranked:
+        return "created_at"
+    return sort_by
+
+
+class SearchSpec:
+    """The searchable fields of a collection and their weights in ranking
+
+    Each document stores its searchable words in `search_terms`, tagged
+    with their field: "name=revenue" for the word and "name:re",
+    "name:rev", ... for its prefixes. A multikey index on the array finds
+    prefix matches by equality. Each search word must match a prefix in
+    some field; a match scores the field's weight, and a whole-word match
+    scores it again.
+    """
+
+    def __init__(self, collection: str, weights: Dict[str, int]):
+        self.collection = collection
+        self.weights = weights
+
+    def terms(self, document: Dict[str, Any]) -> List[str]:
+        """Build the search_terms of a document"""
+        terms = set()
+        for field in self.weights:
+            for word in tokenize(document.get(field) or ""):
+                terms.add(f"{field}={word}")
+                for length in range(settings.SEARCH_MIN_PREFIX, min(len(word), settings.SEARCH_MAX_PREFIX) + 1):
+                    terms.add(f"{field}:{word[:length]}")
+        return sorted(terms)
+
+    def touches(self, update: Dict[str, Any]) -> bool:
+        """Check whether an update changes any searchable field"""
+        return any(field in update for field in self.weights)
+
+    def prefix_tags(self, term: str) -> List[str]:
+        return [f"{field}:{term[:settings.SEARCH_MAX_PREFIX]}" for field in self.weights]
+
+    def field_tags(self, terms: List[str]) -> Dict[str, List[str]]:
+        """The tags of each field that score for a query"""
+        return {
+            field: [f"{field}:{term[:settings.SEARCH_MAX_PREFIX]}" for term in terms] + [f"{field}={term}" for term in terms]
+            for field in self.weights
+        }
+
+    def narrow(self, query: Dict[str, Any], text: Optional[str]) -> bool:
+        """Add a search to a MongoDB query, if it has any words to match"""
+        terms = query_terms(text)
+        if not terms:
+            return False
+        query.setdefault("$and", []).extend({"search_terms": {"$in": self.prefix_tags(term)}} for term in terms)
+        return True
+
+    def rank(self, text: Optional[str]) -> Dict[str, Any]:
+        """An $addFields spec scoring each match of a search as `relevance`"""
+        return {"relevance": {"$add": [
+            {"$multiply": [self.weights[field], {"$size": {"$setIntersection": ["$search_terms", tags]}}]}
+            for field, tags in self.field_tags(query_terms(text)).items()
+        ]}}
+
+
+ANALYSIS_SEARCH = SearchSpec("analyses", {"name": 3, "period": 2, "description": 1})
+QUESTION_SEARCH = SearchSpec("market_questions", {"question": 3, "dashboard": 2, "report": 2})
+USER_SEARCH = SearchSpec("users", {"username": 3, "full_name": 3, "email": 2})
+
+SEARCH_SPECS = [ANALYSIS_SEARCH, QUESTION_SEARCH, USER_SEARCH]
+
+
+class SearchIndex:
+    """In-process inverted index over search_terms, for mock data
+
+    Matches and scores the same way as a search against MongoDB.
+    """
+
+    def __init__(self, spec: SearchSpec, documents: Iterable[Dict[str, Any]] = ()):
+        self.spec = spec
+        self.postings: Dict[str, Set[str]] = defaultdict(set)
+        self.documents: Dict[str, Set[str]] = {}
+        for document in documents:
+            self.add(document)
+
+    def add(self, document: Dict[str, Any]) -> None:
+        """Index a document, replacing its previous entry"""
+        self.remove(document["_id"])
+        terms = set(self.spec.terms(document))
+        self.documents[document["_id"]] = terms
+        for term in terms:
+            self.postings[term].add(document["_id"])
+
+    def remove(self, document_id: str) -> None:
+        for term in self.documents.pop(document_id, ()):
+            self.postings[term].discard(document_id)
+            if not self.postings[term]:
+                del self.postings[term]
+
+    def search(self, text: Optional[str]) -> Optional[Dict[str, int]]:
+        """Get the relevance of each document matching a search, or None if it has no words to match"""
+        terms = query_terms(text)
+        if not terms:
+            return None
+
+        matches = None
+        for term in terms:
+            found = set().union(*(self.postings.get(tag, set()) for tag in self.spec.prefix_tags(term)))
+            matches = found if matches is None else matches & found
+
+        field_tags = {field: set(tags) for field, tags in self.spec.field_tags(terms).items()}
+        return {
+            document_id: sum(
+                self.spec.weights[field] * len(self.documents[document_id] & tags)
+                for field, tags in field_tags.items()
+            )
+            for document_id in matches
+        }
+
+
+async def reindex(database, spec: SearchSpec, rebuild: bool = False, batch_size: int = 500) -> int:
+    """Fill in search_terms for a collection's documents that have none, or for all of them"""
+    query = {} if rebuild else {"search_terms": {"$exists": False}}
+    projection = {field: 1 for field in spec.weights}
+    updated = 0
+    batch = []
+
+    async for document in database[spec.collection].find(query, projection):
+        # Skip documents whose searchable fields changed since they were read;
+        # the write that changed them set their search_terms
+        unchanged = {"_id": document["_id"], **{field: document.get(field) for field in spec.weights}}
+        batch.append(UpdateOne(unchanged, {"$set": {"search_terms": spec.terms(document)}}))
+        if len(batch) >= batch_size:
+            updated += (await database[spec.collection].bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        updated += (await database[spec.collection].bulk_write(batch, ordered=False)).modified_count
+    return updated
+
+
+async def main(argv: List[str]) -> int:
+    """Rebuild search_terms after changing the fields or tokenizer with --all
+
+    Documents without search_terms are filled in on startup, so running
+    this without --all is only needed to fill them in without restarting.
+    """
+    from app.core.database import close_mongo_connection, connect_to_mongo, db
+
+    if settings.DISABLE_DATABASE:
+        print("DISABLE_DATABASE is set; set it to false to index documents in MongoDB")
+        return 2
+
+    await connect_to_mongo()
+    if settings.DISABLE_DATABASE:
+        print(f"Could not connect to {settings.MONGODB_URI}")
+        return 2
+
+    try:
+        for spec in SEARCH_SPECS:
+            updated = await reindex(db.database, spec, rebuild="--all" in argv)
+            print(f"{spec.collection}: updated search terms of {updated} documents")
+    finally:
+        await close_mongo_connection()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))
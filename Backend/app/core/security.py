@@ -1,197 +1,362 @@
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import HTTPException, Depends, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from loguru import logger
-
-from app.core.config import settings
-from app.core.database import get_database
-from app.models.user import User
-
-
-# Password context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# Security scheme
-security = HTTPBearer()
-
-
-def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
-    """Create JWT access token"""
-    to_encode = data.copy()
-    
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    to_encode.update({"exp": expire, "type": "access"})
-    
-    encoded_jwt = jwt.encode(
-        to_encode, 
-        settings.SECRET_KEY, 
-        algorithm=settings.ALGORITHM
-    )
-    
-    return encoded_jwt
-
-
-def create_refresh_token(data: Dict[str, Any]) -> str:
-    """Create JWT refresh token"""
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    
-    to_encode.update({"exp": expire, "type": "refresh"})
-    
-    encoded_jwt = jwt.encode(
-        to_encode,
-        settings.SECRET_KEY,
-        algorithm=settings.ALGORITHM
-    )
-    
-    return encoded_jwt
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password against hash"""
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    """Hash password"""
-    return pwd_context.hash(password)
-
-
-def verify_token(token: str, token_type: str = "access") -> Optional[Dict[str, Any]]:
-    """Verify JWT token"""
-    try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
-        
-        # Check token type
-        if payload.get("type") != token_type:
-            return None
-        
-        # Check expiration
-        exp = payload.get("exp")
-        if exp is None or datetime.utcnow() > datetime.fromtimestamp(exp):
-            return None
-        
-        return payload
-    
-    except JWTError as e:
-        logger.warning(f"JWT verification failed: {e}")
-        return None
-
-
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> User:
-    """Get current authenticated user"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    try:
-        # Extract token
-        token = credentials.credentials
-        
-        # Verify token
-        payload = verify_token(token, "access")
-        if payload is None:
-            raise credentials_exception
-        
-        # Get user ID
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        
-        # Get database (or mock)
-        db = get_database()
-        if settings.DISABLE_DATABASE:
-            # Using mock data service
-            user_data = db.get_user_by_id(user_id)
-            if user_data is None:
-                # Return default mock user for development
-                return User(
-                    _id="mock-user-id",
-                    username="devuser",
-                    email="dev@example.com",
-                    full_name="Development User",
-                    role="admin",
-                    is_active=True,
-                    created_at=datetime.utcnow(),
-                    updated_at=datetime.utcnow()
-                )
-            
-            # Convert mock data to User model
-            return User(
-                _id=user_data["id"],
-                username=user_data["username"],
-                email=user_data["email"],
-                full_name=user_data["full_name"],
-                role=user_data["role"],
-                is_active=user_data["is_active"],
-                created_at=datetime.fromisoformat(user_data["created_at"].replace("Z", "+00:00")),
-                updated_at=datetime.fromisoformat(user_data["updated_at"].replace("Z", "+00:00")),
-                last_login=datetime.fromisoformat(user_data["last_login"].replace("Z", "+00:00")) if user_data.get("last_login") else None
-            )
-        else:
-            # Get user from database
-            user_doc = await db.users.find_one({"_id": user_id})
-            
-            if user_doc is None:
-                raise credentials_exception
-            
-            # Convert to User model
-            user = User(**user_doc)
-            
-            return user
-    
-    except Exception as e:
-        logger.error(f"Authentication error: {e}")
-        raise credentials_exception
-
-
-async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
-    """Get current active user"""
-    if not current_user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Inactive user"
-        )
-    return current_user
-
-
-async def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
-    """Get current admin user"""
-    if current_user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
-    return current_user
-
-
-def create_tokens(user_id: str, email: str) -> Dict[str, str]:
-    """Create access and refresh tokens for user"""
-    access_token = create_access_token(
-        data={"sub": user_id, "email": email}
-    )
-    
-    refresh_token = create_refresh_token(
-        data={"sub": user_id, "email": email}
-    )
-    
-    return {
-        "access_token": access_token,
-        "refresh_token": refresh_token,
-        "token_type": "bearer"
-    } 
\ No newline at end of file
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Callable
+from jose import JWTError, jwt
+from passlib.context import CryptContext
+from fastapi import HTTPException, Depends, Request, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from loguru import logger
+import asyncio
+import time
+import uuid
+
+from app.core.config import settings
+from app.core.database import get_database
+from app.core.metrics import (
+    PASSWORD_HASH_IN_FLIGHT,
+    PASSWORD_HASH_QUEUE_DEPTH,
+    PASSWORD_HASH_REJECTED,
+    PASSWORD_HASH_SECONDS,
+    PASSWORD_HASH_WAIT_SECONDS
+)
+from app.core.refresh_tokens import refresh_token_store
+from app.core.token_cache import token_cache, token_digest
+from app.core.user_cache import user_cache
+from app.models.user import Principal, Permission, User, permissions_for
+
+
+# Password context
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Security scheme
+security = HTTPBearer()
+
+
+def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
+    """Create JWT access token"""
+    to_encode = data.copy()
+    
+    if expires_delta:
+        expire = datetime.utcnow() + expires_delta
+    else:
+        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex, "type": "access"})
+    
+    encoded_jwt = jwt.encode(
+        to_encode, 
+        settings.SECRET_KEY, 
+        algorithm=settings.ALGORITHM
+    )
+    
+    return encoded_jwt
+
+
+def create_refresh_token(data: Dict[str, Any]) -> str:
+    """Create JWT refresh token"""
+    to_encode = data.copy()
+    expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex, "type": "refresh"})
+    
+    encoded_jwt = jwt.encode(
+        to_encode,
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM
+    )
+    
+    return encoded_jwt
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify password against hash"""
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    """Hash password"""
+    return pwd_context.hash(password)
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded thread pool so it never blocks the event loop
+
+    bcrypt releases the GIL, so the pool gives real parallelism. A semaphore
+    caps work in flight and callers beyond PASSWORD_HASH_MAX_QUEUE are
+    turned away instead of piling up behind a login burst.
+    """
+
+    def __init__(self, workers: int = settings.PASSWORD_HASH_WORKERS, max_queue: int = settings.PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.waiting = 0
+
+    async def run(self, operation: str, func: Callable, *args):
+        """Run a hashing call on the pool, waiting for a free worker"""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            self.semaphore = asyncio.Semaphore(self.workers)
+
+        if self.waiting >= self.max_queue:
+            PASSWORD_HASH_REJECTED.labels(operation).inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry",
+                headers={"Retry-After": "1"}
+            )
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        PASSWORD_HASH_QUEUE_DEPTH.inc()
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+            PASSWORD_HASH_QUEUE_DEPTH.dec()
+
+        started_at = time.perf_counter()
+        PASSWORD_HASH_WAIT_SECONDS.labels(operation).observe(started_at - queued_at)
+        PASSWORD_HASH_IN_FLIGHT.inc()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            PASSWORD_HASH_IN_FLIGHT.dec()
+            PASSWORD_HASH_SECONDS.labels(operation).observe(time.perf_counter() - started_at)
+            self.semaphore.release()
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+
+# Global password hasher instance
+password_hasher = PasswordHasher()
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify password against hash without blocking the event loop"""
+    return await password_hasher.run("verify", verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash password without blocking the event loop"""
+    return await password_hasher.run("hash", get_password_hash, password)
+
+
+def decode_token(token: str) -> Optional[Dict[str, Any]]:
+    """Check a JWT's signature and expiry and return its claims"""
+    try:
+        payload = jwt.decode(
+            token,
+            settings.SECRET_KEY,
+            algorithms=[settings.ALGORITHM]
+        )
+        
+        # Check expiration
+        exp = payload.get("exp")
+        if exp is None or datetime.utcnow() > datetime.fromtimestamp(exp):
+            return None
+        
+        return payload
+    
+    except JWTError as e:
+        logger.warning(f"JWT verification failed: {e}")
+        return None
+
+
+async def verify_token(token: str, token_type: str = "access") -> Optional[Dict[str, Any]]:
+    """Verify JWT token, reusing earlier verifications of the same token"""
+    digest = token_digest(token)
+    payload = token_cache.get(digest)
+    
+    if payload is None:
+        payload = decode_token(token)
+        if payload is None:
+            return None
+        token_cache.put(digest, payload)
+    
+    # Check token type
+    if payload.get("type") != token_type:
+        return None
+    
+    if await token_cache.is_revoked(digest, payload):
+        return None
+    
+    return payload
+
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def principal_from_token(token: str) -> Principal:
+    """Build the caller's principal from a verified access token"""
+    payload = await verify_token(token, "access")
+    if payload is None or payload.get("sub") is None:
+        raise credentials_exception()
+    
+    return Principal(
+        user_id=payload["sub"],
+        email=payload.get("email"),
+        role=payload.get("role"),
+        permissions=payload.get("perm", [])
+    )
+
+
+async def get_current_principal(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> Principal:
+    """Get the authenticated caller, verified once per request and kept on request.state"""
+    principal = getattr(request.state, "principal", None)
+    if principal is None:
+        principal = await principal_from_token(credentials.credentials)
+        request.state.principal = principal
+    return principal
+
+
+async def get_current_user(principal: Principal = Depends(get_current_principal)) -> User:
+    """Get current authenticated user"""
+    try:
+        user_id = principal.user_id
+        
+        # Get database (or mock)
+        db = get_database()
+        if settings.DISABLE_DATABASE:
+            # Using mock data service
+            user_data = db.get_user_by_id(user_id)
+            if user_data is None:
+                # Return default mock user for development
+                return User(
+                    _id="mock-user-id",
+                    username="devuser",
+                    email="dev@example.com",
+                    full_name="Development User",
+                    role="admin",
+                    is_active=True,
+                    created_at=datetime.utcnow(),
+                    updated_at=datetime.utcnow()
+                )
+            
+            # Convert mock data to User model
+            return User(
+                _id=user_data["id"],
+                username=user_data["username"],
+                email=user_data["email"],
+                full_name=user_data["full_name"],
+                role=user_data["role"],
+                is_active=user_data["is_active"],
+                created_at=datetime.fromisoformat(user_data["created_at"].replace("Z", "+00:00")),
+                updated_at=datetime.fromisoformat(user_data["updated_at"].replace("Z", "+00:00")),
+                last_login=datetime.fromisoformat(user_data["last_login"].replace("Z", "+00:00")) if user_data.get("last_login") else None
+            )
+        else:
+            # Reuse the cached principal; changes to a user invalidate it
+            user = await user_cache.get(user_id)
+            if user is not None:
+                return user
+            
+            # Get user from database
+            user_doc = await db.users.find_one({"_id": user_id}, {"hashed_password": 0})
+            
+            if user_doc is None:
+                raise credentials_exception()
+            
+            # Convert to User model
+            user = User(**user_doc)
+            await user_cache.set(user)
+            
+            return user
+    
+    except Exception as e:
+        logger.error(f"Authentication error: {e}")
+        raise credentials_exception()
+
+
+async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+    """Get current active user"""
+    if not current_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+    return current_user
+
+
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+    """Get current admin user"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return current_user
+
+
+def require_permission(permission: Permission) -> Callable:
+    """Dependency admitting only callers whose token grants a permission
+    
+    Permissions are embedded in the token when it is issued, so the check
+    needs no database lookup.
+    """
+    async def check_permission(principal: Principal = Depends(get_current_principal)) -> Principal:
+        if principal.role is None:
+            # Token issued before role claims: derive them from the user once
+            user = await get_current_user(principal)
+            principal.role = user.role.value
+            principal.permissions = permissions_for(user.role)
+        
+        if permission.value not in principal.permissions:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions"
+            )
+        return principal
+    
+    return check_permission
+
+
+def create_tokens(user_id: str, email: str, role: str, family: Optional[str] = None) -> Dict[str, str]:
+    """Create access and refresh tokens for user"""
+    role = getattr(role, "value", role)
+    
+    access_token = create_access_token(
+        data={"sub": user_id, "email": email, "role": role, "perm": permissions_for(role)}
+    )
+    
+    refresh_token = create_refresh_token(
+        data={"sub": user_id, "email": email, "role": role, "fam": family or uuid.uuid4().hex}
+    )
+    
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer"
+    }
+
+
+async def issue_tokens(user_id: str, email: str, role: str) -> Dict[str, str]:
+    """Create tokens for a new login, starting a refresh token family"""
+    tokens = create_tokens(user_id, email, role)
+    await refresh_token_store.add(jwt.get_unverified_claims(tokens["refresh_token"]))
+    return tokens
+
+
+async def rotate_tokens(payload: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """Exchange a verified refresh token for a new pair in the same family
+
+    Returns None if the token was already used; its family is revoked then.
+    """
+    tokens = create_tokens(payload["sub"], payload["email"], payload["role"], family=payload["fam"])
+    successor = jwt.get_unverified_claims(tokens["refresh_token"])
+    if await refresh_token_store.rotate(payload, successor) is None:
+        return None
+    return tokens
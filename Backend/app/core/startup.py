@@ -0,0 +1,49 @@
+from loguru import logger
+from typing import List, Tuple
+import time
+
+
+class StartupTimer:
+    """Cold-start timing, split into the phases of import and startup
+
+    main.py marks each phase as it finishes, so the report shows where time
+    goes between the first import and the app accepting requests. Run
+    `python -m app.core.startup` to measure importing `main:app`.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str) -> None:
+        """Record the time since the previous mark as a phase"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    @property
+    def total(self) -> float:
+        return self.last - self.started
+
+    def report(self) -> str:
+        lines = [f"{phase:<12} {seconds * 1000:8.1f} ms" for phase, seconds in self.phases]
+        lines.append(f"{'total':<12} {self.total * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+    def log(self) -> None:
+        logger.info(f"⏱️ Cold start took {self.total * 1000:.0f} ms\n{self.report()}")
+
+
+# Global startup timer, created by the first import in main.py
+startup_timer = StartupTimer()
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    import main  # noqa: F401
+    elapsed = time.perf_counter() - started
+
+    from app.core.startup import startup_timer as main_timer
+    print(main_timer.report())
+    print(f"Imported main:app in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,245 @@
+from fastapi import UploadFile
+from loguru import logger
+from pymongo import ReturnDocument
+from typing import AsyncIterator, List, Optional, Tuple
+from datetime import datetime
+import aiofiles
+import hashlib
+import os
+import shutil
+import uuid
+
+from app.core.config import settings
+from app.core.database import get_database
+
+
+class UploadTooLargeError(Exception):
+    """Raised when a streamed upload crosses the configured size limit"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"Upload exceeds maximum size of {max_size} bytes")
+
+
+def temp_path_for(file_path: str) -> str:
+    """Get a unique temporary path next to the final destination"""
+    directory, filename = os.path.split(file_path)
+    return os.path.join(directory, f".{filename}.{uuid.uuid4().hex}.part")
+
+
+def remove_quietly(file_path: Optional[str]) -> None:
+    """Remove a file, ignoring errors if it is already gone"""
+    if not file_path:
+        return
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"⚠️ Could not remove file {file_path}: {e}")
+
+
+def remove_tree_quietly(directory: str) -> None:
+    """Remove a directory tree, ignoring errors"""
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+async def iter_upload_chunks(
+    upload: UploadFile,
+    chunk_size: int = settings.UPLOAD_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """Read an UploadFile in fixed-size chunks"""
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def iter_file_chunks(
+    file_path: str,
+    chunk_size: int = settings.UPLOAD_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """Read a file on disk in fixed-size chunks"""
+    async with aiofiles.open(file_path, "rb") as f:
+        while True:
+            chunk = await f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+async def stream_chunks_to_file(
+    chunks: AsyncIterator[bytes],
+    file_path: str,
+    max_size: int = settings.MAX_FILE_SIZE
+) -> int:
+    """Write a chunk stream to disk atomically and return its size"""
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    temp_path = temp_path_for(file_path)
+    file_size = 0
+
+    try:
+        async with aiofiles.open(temp_path, "wb") as out:
+            async for chunk in chunks:
+                file_size += len(chunk)
+                if file_size > max_size:
+                    raise UploadTooLargeError(max_size)
+
+                await out.write(chunk)
+
+        # Atomic rename so readers never see a partially written file
+        os.replace(temp_path, file_path)
+    except BaseException:
+        remove_quietly(temp_path)
+        raise
+
+    return file_size
+
+
+async def iter_files_chunks(
+    file_paths: List[str],
+    chunk_size: int = settings.UPLOAD_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """Read several files back to back as one chunk stream"""
+    for file_path in file_paths:
+        async for chunk in iter_file_chunks(file_path, chunk_size):
+            yield chunk
+
+
+# Content-addressed blob store
+#
+# Uploaded content is stored once under its SHA-256 digest. Every file
+# document pointing at a blob holds one reference, counted on the blob's
+# document in the blobs collection, keyed by digest.
+
+def blob_path_for(digest: str) -> str:
+    """Get the on-disk path of a blob"""
+    return os.path.join(settings.UPLOAD_DIR, "blobs", digest[:2], digest)
+
+
+async def write_blob(
+    chunks: AsyncIterator[bytes],
+    max_size: int = settings.MAX_FILE_SIZE
+) -> Tuple[str, int, str]:
+    """Stream content into the blob store and return (digest, size, blob_path)
+
+    The caller holds a reference to the blob afterwards and must release
+    it if the content isn't kept. The reference is taken before the
+    content is moved into place, so a concurrent release of the same blob
+    can't unlink it under us.
+    """
+    temp_dir = os.path.join(settings.UPLOAD_DIR, "blobs")
+    os.makedirs(temp_dir, exist_ok=True)
+    temp_path = os.path.join(temp_dir, f".{uuid.uuid4().hex}.part")
+    sha256 = hashlib.sha256()
+    file_size = 0
+
+    try:
+        async with aiofiles.open(temp_path, "wb") as out:
+            async for chunk in chunks:
+                file_size += len(chunk)
+                if file_size > max_size:
+                    raise UploadTooLargeError(max_size)
+
+                sha256.update(chunk)
+                await out.write(chunk)
+
+        digest = sha256.hexdigest()
+        blob_path = blob_path_for(digest)
+        await acquire_blob(digest, file_size)
+    except BaseException:
+        remove_quietly(temp_path)
+        raise
+
+    try:
+        # Known content is replaced by identical bytes, which readers can't tell apart
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        os.replace(temp_path, blob_path)
+    except BaseException:
+        remove_quietly(temp_path)
+        await release_blob(digest)
+        raise
+
+    return digest, file_size, blob_path
+
+
+async def acquire_blob(digest: str, size: int) -> int:
+    """Add a reference to a blob and return the new reference count"""
+    db = get_database()
+
+    if settings.DISABLE_DATABASE:
+        return db.acquire_blob(digest, size, blob_path_for(digest))
+
+    blob_doc = await db.blobs.find_one_and_update(
+        {"_id": digest},
+        {
+            "$inc": {"ref_count": 1},
+            "$setOnInsert": {
+                "size": size,
+                "file_path": blob_path_for(digest),
+                "created_at": datetime.utcnow()
+            }
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return blob_doc["ref_count"]
+
+
+async def release_blob(digest: str) -> int:
+    """Drop a reference to a blob, unlinking it when the last one goes"""
+    db = get_database()
+
+    if settings.DISABLE_DATABASE:
+        ref_count = db.release_blob(digest)
+        if ref_count == 0:
+            await discard_blob(digest)
+        return ref_count
+
+    blob_doc = await db.blobs.find_one_and_update(
+        {"_id": digest},
+        {"$inc": {"ref_count": -1}},
+        return_document=ReturnDocument.AFTER
+    )
+
+    if not blob_doc:
+        await discard_blob(digest)
+        return 0
+
+    if blob_doc["ref_count"] <= 0:
+        # Only the caller that actually removes the document unlinks the blob
+        result = await db.blobs.delete_one({"_id": digest, "ref_count": {"$lte": 0}})
+        if result.deleted_count:
+            await discard_blob(digest)
+        return 0
+
+    return blob_doc["ref_count"]
+
+
+async def blob_referenced(digest: str) -> bool:
+    """Check whether any file holds a reference to a blob"""
+    db = get_database()
+    if settings.DISABLE_DATABASE:
+        return digest in db.blobs
+    return await db.blobs.find_one({"_id": digest}, {"_id": 1}) is not None
+
+
+async def discard_blob(digest: str) -> None:
+    """Unlink a blob whose last reference is gone, unless it was acquired again meanwhile
+
+    The content is moved aside before the references are checked again.
+    A writer that acquired the blob in between has either already moved
+    its copy into place, which is put back here, or will do so after.
+    """
+    blob_path = blob_path_for(digest)
+    trash_path = temp_path_for(blob_path)
+    try:
+        os.replace(blob_path, trash_path)
+    except FileNotFoundError:
+        return
+
+    if await blob_referenced(digest):
+        os.replace(trash_path, blob_path)
+    else:
+        remove_quietly(trash_path)
@@ -0,0 +1,155 @@
+from loguru import logger
+from typing import Any, Dict, Optional
+import asyncio
+import hashlib
+import json
+import time
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.redis import redis_manager
+
+
+REVOCATION_CHANNEL = "token-revocations"
+REVOKED_TOKENS_KEY = "auth:revoked_tokens"  # token digest -> exp
+USER_VALID_AFTER_KEY = "auth:user_valid_after"  # user id -> unix time
+
+
+def token_digest(token: str) -> str:
+    """Key tokens by digest so raw credentials never sit in memory or Redis"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenCache:
+    """Already-verified JWT payloads, plus the revocations that override them
+
+    Verified payloads expire from the cache at the token's own exp, so repeat
+    requests skip signature checks and claim parsing. Revocations are kept in
+    this process for a lookup-free hot path; Redis holds them for other
+    workers, which load them on subscribing and follow changes over pub/sub.
+    Whenever that subscription is down, revocations are checked in Redis
+    directly, and a check that can't reach Redis fails.
+    """
+
+    def __init__(self):
+        self.verified = LRUCache(settings.TOKEN_CACHE_SIZE)
+        self.revoked: Dict[str, float] = {}
+        self.valid_after: Dict[str, float] = {}
+        self.listener: Optional[asyncio.Task] = None
+        self.live = False  # subscribed and loaded, so local revocations are complete
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        return self.verified.get(digest)
+
+    def put(self, digest: str, payload: Dict[str, Any]) -> None:
+        """Cache a verified payload until the token expires"""
+        ttl = payload.get("exp", 0) - time.time()
+        if ttl > 0:
+            self.verified.set(digest, payload, ttl=ttl)
+
+    @staticmethod
+    def issued_before(payload: Dict[str, Any], cutoff: Optional[float]) -> bool:
+        return cutoff is not None and payload.get("iat", 0) <= cutoff
+
+    async def is_revoked(self, digest: str, payload: Dict[str, Any]) -> bool:
+        """Check logout revocations and tokens issued before a user's cutoff"""
+        if digest in self.revoked or self.issued_before(payload, self.valid_after.get(payload.get("sub"))):
+            return True
+        if self.live or settings.DISABLE_REDIS:
+            return False
+
+        # Broadcasts may have been missed while unsubscribed, so ask Redis
+        revoked, cutoff = await asyncio.gather(
+            redis_manager.hget(REVOKED_TOKENS_KEY, digest, strict=True),
+            redis_manager.hget(USER_VALID_AFTER_KEY, payload.get("sub", ""), strict=True)
+        )
+        return revoked is not None or self.issued_before(payload, float(cutoff) if cutoff is not None else None)
+
+    def apply(self, message: str) -> None:
+        """Apply a revocation, local or broadcast by another worker"""
+        event = json.loads(message)
+        if event["kind"] == "token":
+            self.revoked[event["digest"]] = event["exp"]
+            self.verified.delete(event["digest"])
+        else:
+            self.valid_after[event["user_id"]] = max(event["at"], self.valid_after.get(event["user_id"], 0))
+
+    async def publish(self, event: Dict[str, Any]) -> None:
+        message = json.dumps(event)
+        self.apply(message)
+        await redis_manager.publish(REVOCATION_CHANNEL, message, strict=True)
+
+    async def revoke_token(self, token: str, payload: Dict[str, Any]) -> bool:
+        """Revoke a single token until it would have expired anyway
+
+        Returns False if the token was already revoked, so a caller can
+        retire a token exactly once. Raises RedisUnavailable if the
+        revocation couldn't be stored or broadcast, rather than let a
+        logout look successful.
+        """
+        self.prune()
+        digest = token_digest(token)
+        exp = payload.get("exp", time.time() + settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+        already_revoked = digest in self.revoked
+        stored = await redis_manager.hsetnx(REVOKED_TOKENS_KEY, digest, exp, strict=True)
+        await self.publish({"kind": "token", "digest": digest, "exp": exp})
+        return stored and not already_revoked
+
+    async def revoke_user(self, user_id: str) -> None:
+        """Revoke every token issued to a user up to now
+
+        Tokens carry a sub-second iat, so a token issued in the same second
+        just before this is revoked, and one issued just after isn't.
+        Raises RedisUnavailable like revoke_token.
+        """
+        now = time.time()
+        await redis_manager.hset(USER_VALID_AFTER_KEY, user_id, now, strict=True)
+        await self.publish({"kind": "user", "user_id": user_id, "at": now})
+
+    async def load(self) -> None:
+        """Load revocations from Redis and drop the ones that no longer matter"""
+        now = time.time()
+        revoked = await redis_manager.hgetall(REVOKED_TOKENS_KEY, strict=True)
+        expired = [digest for digest, exp in revoked.items() if float(exp) <= now]
+        await redis_manager.hdel(REVOKED_TOKENS_KEY, *expired)
+        self.revoked.update({digest: float(exp) for digest, exp in revoked.items() if float(exp) > now})
+
+        # A cutoff older than the longest token lifetime can't match any live token
+        horizon = now - settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+        valid_after = await redis_manager.hgetall(USER_VALID_AFTER_KEY, strict=True)
+        stale = [user_id for user_id, at in valid_after.items() if float(at) < horizon]
+        await redis_manager.hdel(USER_VALID_AFTER_KEY, *stale)
+        self.valid_after.update({user_id: float(at) for user_id, at in valid_after.items() if float(at) >= horizon})
+
+    def prune(self) -> None:
+        """Forget token revocations past their expiry"""
+        now = time.time()
+        for digest in [digest for digest, exp in self.revoked.items() if exp <= now]:
+            del self.revoked[digest]
+
+    async def resync(self) -> None:
+        """Reload revocations once subscribed, so nothing published in between is missed"""
+        await self.load()
+        self.live = True
+        logger.info("✅ Following token revocations")
+
+    def lost(self) -> None:
+        self.live = False
+
+    async def start(self) -> None:
+        if settings.DISABLE_REDIS or self.listener is not None:
+            return
+        self.listener = asyncio.create_task(
+            redis_manager.follow(REVOCATION_CHANNEL, self.apply, on_subscribe=self.resync, on_lost=self.lost)
+        )
+
+    async def stop(self) -> None:
+        if self.listener is not None:
+            self.listener.cancel()
+            await asyncio.gather(self.listener, return_exceptions=True)
+            self.listener = None
+        self.live = False
+
+
+# Global token cache instance
+token_cache = TokenCache()
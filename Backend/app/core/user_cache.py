@@ -0,0 +1,97 @@
+from loguru import logger
+from typing import Optional
+import asyncio
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.redis import redis_manager
+from app.models.user import User
+
+
+# Workers tell each other to drop a user from their local cache on this channel
+INVALIDATION_CHANNEL = "user-cache-invalidations"
+# Local TTL while invalidations may be missed, so stale users expire quickly
+UNSUBSCRIBED_TTL = 5
+
+
+class UserCache:
+    """Authenticated user principals, so get_current_user skips the users lookup
+
+    Users live in an in-process TTL LRU, backed by Redis when it is enabled.
+    Invalidations delete the Redis entry and are broadcast over pub/sub so
+    every worker drops its local copy at once. While the subscription is
+    down, local entries only live for UNSUBSCRIBED_TTL seconds.
+    """
+
+    def __init__(self):
+        self.local = LRUCache(settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+        self.listener: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def redis_key(user_id: str) -> str:
+        return f"user:{user_id}"
+
+    async def get(self, user_id: str) -> Optional[User]:
+        """Get a cached user, checking this process before Redis"""
+        user = self.local.get(user_id)
+        if user is not None:
+            return user
+
+        if settings.DISABLE_REDIS:
+            return None
+
+        data = await redis_manager.get(self.redis_key(user_id))
+        if not isinstance(data, dict):
+            return None
+        user = User(**data)
+        self.local.set(user_id, user)
+        return user
+
+    async def set(self, user: User) -> None:
+        """Cache a user loaded from the database"""
+        self.local.set(user.id, user)
+        if not settings.DISABLE_REDIS:
+            await redis_manager.set(
+                self.redis_key(user.id),
+                user.model_dump(mode="json", by_alias=True),
+                settings.USER_CACHE_TTL
+            )
+
+    async def invalidate(self, user_id: str) -> None:
+        """Drop a user everywhere after it was changed or deleted"""
+        self.local.delete(user_id)
+        if not settings.DISABLE_REDIS:
+            await redis_manager.delete(self.redis_key(user_id))
+            await redis_manager.publish(INVALIDATION_CHANNEL, user_id)
+
+    async def resync(self) -> None:
+        """Start trusting invalidations again once subscribed, dropping whatever may have been missed"""
+        self.local.clear()
+        self.local.ttl = settings.USER_CACHE_TTL
+        logger.info("✅ Following user cache invalidations")
+
+    def lost(self) -> None:
+        """Fall back to a short TTL rather than serving stale users while unsubscribed"""
+        self.local.clear()
+        self.local.ttl = min(settings.USER_CACHE_TTL, UNSUBSCRIBED_TTL)
+
+    def start(self) -> None:
+        if self.listener is None and not settings.DISABLE_REDIS:
+            self.listener = asyncio.create_task(
+                redis_manager.follow(INVALIDATION_CHANNEL, self.local.delete, on_subscribe=self.resync, on_lost=self.lost)
+            )
+
+    async def stop(self) -> None:
+        if self.listener is not None:
+            self.listener.cancel()
+            await asyncio.gather(self.listener, return_exceptions=True)
+            self.listener = None
+
+
+# Global user cache instance
+user_cache = UserCache()
+
+
+async def invalidate_user(user_id: str) -> None:
+    """Invalidate a cached user principal"""
+    await user_cache.invalidate(user_id)
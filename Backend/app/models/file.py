@@ -0,0 +1,43 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+from enum import Enum
+
+
+class FileStatus(str, Enum):
+    UPLOADING = "uploading"
+    ASSEMBLING = "assembling"
+    UPLOADED = "uploaded"
+    PROCESSING = "processing"
+    PROCESSED = "processed"
+    FAILED = "failed"
+
+
+class FileLinkRequest(BaseModel):
+    sha256: str = Field(..., pattern="^[0-9a-f]{64}$")
+    filename: Optional[str] = Field(None, min_length=1, max_length=255)
+    analysis_id: Optional[str] = None
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+    content_type: str
+    size: int = Field(..., gt=0)
+    part_size: Optional[int] = Field(None, gt=0)
+    analysis_id: Optional[str] = None
+    bank: Optional[str] = Field(None, max_length=100)
+
+
+class UploadSessionResponse(BaseModel):
+    session_id: str
+    filename: str
+    content_type: str
+    size: int
+    part_size: int
+    total_parts: int
+    received_parts: List[int] = Field(default_factory=list)
+    missing_parts: List[int] = Field(default_factory=list)
+    received_bytes: int = 0
+    status: FileStatus
+    analysis_id: Optional[str] = None
+    expires_at: datetime
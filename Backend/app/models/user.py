@@ -1,80 +1,119 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
-from datetime import datetime
-from enum import Enum
-
-
-class UserRole(str, Enum):
-    ADMIN = "admin"
-    ANALYST = "analyst"
-    VIEWER = "viewer"
-
-
-class UserBase(BaseModel):
-    username: str = Field(..., min_length=3, max_length=50)
-    email: EmailStr
-    full_name: str = Field(..., min_length=1, max_length=100)
-    role: UserRole = UserRole.ANALYST
-    is_active: bool = True
-
-
-class UserCreate(UserBase):
-    password: str = Field(..., min_length=8, max_length=100)
-
-
-class UserUpdate(BaseModel):
-    username: Optional[str] = Field(None, min_length=3, max_length=50)
-    email: Optional[EmailStr] = None
-    full_name: Optional[str] = Field(None, min_length=1, max_length=100)
-    role: Optional[UserRole] = None
-    is_active: Optional[bool] = None
-
-
-class UserInDB(UserBase):
-    id: str = Field(alias="_id")
-    hashed_password: str
-    created_at: datetime
-    updated_at: datetime
-    last_login: Optional[datetime] = None
-
-
-class User(UserBase):
-    id: str = Field(alias="_id")
-    created_at: datetime
-    updated_at: datetime
-    last_login: Optional[datetime] = None
-    
-    class Config:
-        populate_by_name = True
-
-
-class UserResponse(BaseModel):
-    id: str
-    username: str
-    email: str
-    full_name: str
-    role: UserRole
-    is_active: bool
-    created_at: datetime
-    last_login: Optional[datetime] = None
-
-
-class LoginRequest(BaseModel):
-    email: EmailStr
-    password: str
-
-
-class LoginResponse(BaseModel):
-    access_token: str
-    refresh_token: str
-    token_type: str = "bearer"
-    user: UserResponse
-
-
-class RefreshTokenRequest(BaseModel):
-    refresh_token: str
-
-
-class PasswordChangeRequest(BaseModel):
-    current_password: str
-    new_password: str = Field(..., min_length=8, max_length=100) 
\ No newline at end of file
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, List
+from datetime import datetime
+from enum import Enum
+
+
+class UserRole(str, Enum):
+    ADMIN = "admin"
+    ANALYST = "analyst"
+    VIEWER = "viewer"
+
+
+class Permission(str, Enum):
+    USERS_READ = "users:read"
+    USERS_WRITE = "users:write"
+
+
+ROLE_PERMISSIONS = {
+    UserRole.ADMIN.value: [Permission.USERS_READ, Permission.USERS_WRITE],
+    UserRole.ANALYST.value: [],
+    UserRole.VIEWER.value: [],
+}
+
+
+def permissions_for(role: str) -> List[str]:
+    """Get the permissions granted to a role"""
+    return [permission.value for permission in ROLE_PERMISSIONS.get(getattr(role, "value", role), [])]
+
+
+class UserBase(BaseModel):
+    username: str = Field(..., min_length=3, max_length=50)
+    email: EmailStr
+    full_name: str = Field(..., min_length=1, max_length=100)
+    role: UserRole = UserRole.ANALYST
+    is_active: bool = True
+
+
+class UserCreate(UserBase):
+    password: str = Field(..., min_length=8, max_length=100)
+
+
+class UserUpdate(BaseModel):
+    username: Optional[str] = Field(None, min_length=3, max_length=50)
+    email: Optional[EmailStr] = None
+    full_name: Optional[str] = Field(None, min_length=1, max_length=100)
+    role: Optional[UserRole] = None
+    is_active: Optional[bool] = None
+
+
+class UserInDB(UserBase):
+    id: str = Field(alias="_id")
+    hashed_password: str
+    created_at: datetime
+    updated_at: datetime
+    last_login: Optional[datetime] = None
+
+
+class User(UserBase):
+    id: str = Field(alias="_id")
+    created_at: datetime
+    updated_at: datetime
+    last_login: Optional[datetime] = None
+    
+    class Config:
+        populate_by_name = True
+
+
+class Principal(BaseModel):
+    """The authenticated caller, as described by their access token's claims"""
+    user_id: str
+    email: Optional[str] = None
+    role: Optional[str] = None
+    permissions: List[str] = []
+
+
+class UserResponse(BaseModel):
+    id: str
+    username: str
+    email: str
+    full_name: str
+    role: UserRole
+    is_active: bool
+    created_at: datetime
+    last_login: Optional[datetime] = None
+
+
+class LoginRequest(BaseModel):
+    email: EmailStr
+    password: str
+
+
+class LoginResponse(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    user: UserResponse
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+
+class PasswordChangeRequest(BaseModel):
+    current_password: str
+    new_password: str = Field(..., min_length=8, max_length=100) 
+
+
+class UserListResponse(BaseModel):
+    users: List[UserResponse]
+    total: Optional[int] = None  # left out on cursor pages
+    page: int
+    size: int
+    pages: Optional[int] = None
+    total_estimated: bool = False  # total stopped counting at PAGINATION_COUNT_LIMIT
+    next_cursor: Optional[str] = None  # pass as ?cursor= for the following page
@@ -1,39 +1,65 @@
+# Imported first so the cold-start report covers every import below
+from app.core.startup import startup_timer
 import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
+from slowapi.middleware import SlowAPIASGIMiddleware
 import uvicorn
 from loguru import logger
 import os
+startup_timer.mark("framework")
 
 from app.core.config import settings
+startup_timer.mark("config")
 from app.core.database import connect_to_mongo, close_mongo_connection
-from app.core.redis import connect_to_redis, close_redis_connection
+from app.core.redis import RedisUnavailable, connect_to_redis, close_redis_connection, redis_manager
+from app.core.extraction import shutdown_extraction
+from app.core.jobs import shutdown_jobs
+from app.core.events import attach_client_manager, socket_app
+from app.core.metrics import render_metrics
+from app.core.probes import detect_dependencies
+from app.core.rate_limit import limiter
 from app.api.v1.api import api_router
-from app.core.security import get_current_user
+from app.core.security import get_current_user, password_hasher
+from app.core.token_cache import token_cache
+from app.core.user_cache import user_cache
+startup_timer.mark("modules")
 
 
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    startup_timer.mark("server")
     logger.info("🚀 Starting FP&A Analysis Backend")
+    await detect_dependencies()
+    startup_timer.mark("probes")
     await connect_to_mongo()
+    startup_timer.mark("mongo")
     await connect_to_redis()
+    attach_client_manager()
+    startup_timer.mark("redis")
+    user_cache.start()
+    await token_cache.start()
+    startup_timer.mark("caches")
+    startup_timer.log()
     logger.info("✅ Backend startup complete")
     
     yield
     
     # Shutdown
     logger.info("🔄 Shutting down backend")
+    await user_cache.stop()
+    await token_cache.stop()
+    await shutdown_jobs()
+    await shutdown_extraction()
+    password_hasher.shutdown()
     await close_mongo_connection()
     await close_redis_connection()
     logger.info("✅ Backend shutdown complete")
@@ -51,6 +77,18 @@ app = FastAPI(
 # Rate limiting
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+app.add_middleware(SlowAPIASGIMiddleware)
+
+
+@app.exception_handler(RedisUnavailable)
+async def redis_unavailable_handler(request: Request, exc: RedisUnavailable):
+    """Fail requests whose security checks need Redis while it is unreachable"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service temporarily unavailable, please retry"},
+        headers={"Retry-After": "1"}
+    )
+
 
 # Middleware
 app.add_middleware(
@@ -75,7 +113,12 @@ app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 # Routes
 app.include_router(api_router, prefix="/api/v1")
 
+# Server push of analysis, job, extraction and market research events
+app.mount("/socket.io", socket_app)
+startup_timer.mark("app")
+
 @app.get("/")
+@limiter.exempt
 async def root():
     return {
         "message": "FP&A Intelligence API",
@@ -88,15 +131,24 @@ async def root():
     }
 
 @app.get("/health")
+@limiter.exempt
 async def health_check():
     return {
         "status": "healthy",
         "environment": settings.ENVIRONMENT,
         "timestamp": "2024-01-01T00:00:00Z",
         "database": "connected" if not settings.DISABLE_DATABASE else "disabled",
-        "redis": "connected" if not settings.DISABLE_REDIS else "disabled"
+        "redis": "connected" if not settings.DISABLE_REDIS else "disabled",
+        "redis_pool": redis_manager.pool_stats()
     }
 
+@app.get("/metrics", include_in_schema=False)
+@limiter.exempt
+async def metrics():
+    """Prometheus metrics"""
+    body, content_type = render_metrics()
+    return Response(content=body, headers={"Content-Type": content_type})
+
 # Development demo endpoints (no auth required)
 if settings.ENVIRONMENT == "development":
     @app.get("/demo/analyses")